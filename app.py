@@ -2,10 +2,23 @@ import streamlit as st
 import os
 import logging
 import time
+import collections
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+@st.cache_resource(show_spinner=False)
+def _load_environment() -> bool:
+    """Load .env once per server process and report whether an OpenAI key is configured"""
+    load_dotenv()
+    return bool(os.environ.get("OPENAI_API_KEY"))
+
+# Load environment variables - Streamlit re-executes this module on every rerun,
+# so the .env parse and key lookup are memoized for the life of the process
+_HAS_OPENAI_KEY = _load_environment()
+
+# Bulk deployments can route triangulation through the OpenAI Batch API (cheaper, slower)
+_BATCH_MODE = os.getenv("OPENAI_BATCH_MODE", "").lower() == "true"
 
 # Configure logging
 logging.basicConfig(
@@ -14,6 +27,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between UI repaints while streaming workflow chunks
+STREAM_FLUSH_INTERVAL = 0.05
+
+# Seconds between progress polls of a background workflow job
+WORKFLOW_POLL_INTERVAL = 1.0
+
 # Import our application components
 from src.ui.components import (
     render_header,
@@ -23,10 +42,12 @@ from src.ui.components import (
     render_triangulation_section,
     render_individual_results,
     render_final_results,
-    render_logs_section
+    render_logs_section,
+    get_uploaded_files,
+    remove_uploaded_file
 )
 from src.utils.state import create_initial_state, get_agent_results
-from src.agents.workflow import stream_spec_extraction
+from src.utils.file_store import ensure_file_content
 
 def initialize_session_state():
     """Initialize session state variables"""
@@ -38,6 +59,9 @@ def initialize_session_state():
     
     if "restart_triangulation" not in st.session_state:
         st.session_state.restart_triangulation = False
+    
+    if "workflow_job" not in st.session_state:
+        st.session_state.workflow_job = None
 
 def validate_inputs(product_name: str, uploaded_files: dict) -> tuple[bool, str]:
     """Validate user inputs"""
@@ -48,16 +72,67 @@ def validate_inputs(product_name: str, uploaded_files: dict) -> tuple[bool, str]
         return False, "Please upload at least one CSV file"
     
     # Validate OpenAI API key
-    if not os.getenv("OPENAI_API_KEY"):
+    if not _HAS_OPENAI_KEY:
         return False, "OpenAI API key not configured. Please check your environment variables."
     
     return True, ""
 
+def input_fingerprint(product_name: str, uploaded_files: dict) -> str:
+    """Content hash identifying a product name + uploaded files combination"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(product_name.encode())
+    for source_key in sorted(uploaded_files):
+        h.update(b"\0" + source_key.encode() + b"\0")
+        h.update(uploaded_files[source_key].encode())
+    return h.hexdigest()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _cached_initial_state(product_name: str, files_items: tuple, batch_mode: bool) -> dict:
+    """Build the initial workflow state, memoized on product name and file contents"""
+    return create_initial_state(product_name, dict(files_items), batch_mode=batch_mode)
+
+def build_initial_state(product_name: str, uploaded_files: dict) -> dict:
+    """Get the initial state for a run, reusing the cached copy for identical inputs"""
+    # cache_data hands back a fresh copy per call, so callers may mutate it freely
+    state = _cached_initial_state(product_name, tuple(sorted(uploaded_files.items())), _BATCH_MODE)
+    # The cached state only holds upload store paths, which retention, a restart or a
+    # changed STRIVE_UPLOAD_DIR may have removed since it was built
+    state["uploaded_files"] = {
+        source_key: ensure_file_content(path, uploaded_files[source_key])
+        for source_key, path in state["uploaded_files"].items()
+    }
+    return state
+
+class _CacheMiss(Exception):
+    """Raised by the results cache on a lookup for inputs it has no stored result for"""
+
+@st.cache_data(persist="disk", max_entries=64, show_spinner=False)
+def _stored_spec_extraction(product_name: str, files_items: tuple, _final_state: dict = None) -> dict:
+    """Meta-ensemble results memoized on product name and file contents
+    
+    Called without _final_state it is a lookup and raises _CacheMiss when nothing is stored
+    (exceptions are never memoized); called with it, it stores that state. Both happen on
+    the script thread, so only the uncached workflow itself runs on the worker pool.
+    """
+    if _final_state is None:
+        raise _CacheMiss()
+    return _final_state
+
+@st.cache_resource
+def _executor() -> ThreadPoolExecutor:
+    """Shared worker pool that runs workflows off the Streamlit script thread"""
+    return ThreadPoolExecutor(max_workers=2)
+
+def _run_workflow_job(state: dict) -> dict:
+    """Worker-thread entry point for a non-streaming workflow run"""
+    from src.agents.workflow import run_spec_extraction
+    return run_spec_extraction(state)
+
 def run_extraction_workflow(product_name: str, uploaded_files: dict):
     """Run the extraction workflow with real-time updates"""
     try:
         # Create initial state
-        initial_state = create_initial_state(product_name, uploaded_files)
+        initial_state = build_initial_state(product_name, uploaded_files)
         
         # Create placeholders for real-time updates
         status_placeholder = st.empty()
@@ -66,50 +141,106 @@ def run_extraction_workflow(product_name: str, uploaded_files: dict):
         
         # Track processing state
         st.session_state.processing_active = True
-        current_state = initial_state.copy()
+        # Chunk updates land in a small overlay over the initial state (which carries the
+        # uploaded file contents) instead of copying and re-merging the full dict
+        delta = {}
+        current_state = collections.ChainMap(delta, initial_state)
         
         # Stream the workflow
         logger.info(f"Starting workflow for product: {product_name}")
         
-        try:
-            for chunk in stream_spec_extraction(initial_state):
+        def flush_ui():
+            """Repaint the status and progress placeholders from the merged state"""
+            with status_placeholder.container():
+                render_processing_status(current_state)
+            
+            progress = current_state.get("progress_percentage", 0)
+            progress_placeholder.progress(progress / 100, text=f"{progress}% Complete")
+        
+        finalized = False
+        
+        def finalize(state):
+            """Store final results and render them in place instead of rerunning the script
+            
+            Idempotent: the in-loop completion check and the generator exit paths may
+            both reach here for the same run, but the results are rendered only once.
+            """
+            nonlocal finalized
+            if finalized:
+                return
+            finalized = True
+            
+            st.session_state.processing_active = False
+            st.session_state.final_results = dict(state)
+            
+            # Drop the live progress widgets before drawing the results view
+            status_placeholder.empty()
+            progress_placeholder.empty()
+            logs_placeholder.empty()
+            
+            st.success("✅ Processing completed successfully!")
+            render_results_view()
+        
+        failed = False
+        
+        def log_stream(chunks):
+            """Merge workflow chunks into the state and yield only the log lines they add
+            
+            Feeds st.write_stream, which appends each yield and batches the repaints.
+            Status and progress are repainted once per flush window; last_flush starts
+            at 0 so the first chunk renders immediately.
+            """
+            nonlocal failed
+            last_flush = 0.0
+            last_logs_len = 0
+            
+            for chunk in chunks:
                 # Handle error chunks
                 if "error" in chunk:
-                    st.error("❌ Workflow failed")
-                    st.session_state.processing_active = False
+                    failed = True
                     return
                 
-                # Update current state with chunk data
-                for node_name, node_state in chunk.items():
-                    if isinstance(node_state, dict):
-                        current_state.update(node_state)
+                # Update current state with chunk data - workflow states are plain dicts,
+                # so an exact type check avoids isinstance's ABC dispatch per node
+                for node_state in chunk.values():
+                    if type(node_state) is dict:
+                        delta.update(node_state)
                 
-                # Update UI with current state
-                with status_placeholder.container():
-                    render_processing_status(current_state)
+                completed = current_state.get("current_step") == "completed"
+                now = time.monotonic()
                 
-                with progress_placeholder.container():
-                    progress = current_state.get("progress_percentage", 0)
-                    st.progress(progress / 100)
-                    st.markdown(f"**{progress}% Complete**")
+                # Update UI with current state once per flush window
+                if completed or now - last_flush >= STREAM_FLUSH_INTERVAL:
+                    flush_ui()
+                    last_flush = now
                 
-                with logs_placeholder.container():
-                    logs = current_state.get("logs", [])
-                    if logs:
-                        with st.expander("📋 Real-time Logs", expanded=True):
-                            for log in logs[-5:]:  # Show last 5 logs
-                                st.text(log)
+                # Logs only ever grow, so only the new tail is streamed out
+                logs = current_state.get("logs", [])
+                if len(logs) > last_logs_len:
+                    yield "".join(f"{log}  \n" for log in logs[last_logs_len:])
+                    last_logs_len = len(logs)
                 
-                # Check if completed
-                if current_state.get("current_step") == "completed":
-                    st.session_state.processing_active = False
-                    st.session_state.final_results = current_state
-                    st.success("✅ Processing completed successfully!")
-                    st.rerun()
-                    break
-                
-                # Small delay to prevent UI flooding
-                time.sleep(0.1)
+                if completed:
+                    return
+        
+        # Deferred so views that never run the workflow skip the langgraph/langchain imports
+        from src.agents.workflow import stream_spec_extraction
+        
+        try:
+            with logs_placeholder.container():
+                st.write_stream(log_stream(stream_spec_extraction(initial_state)))
+            
+            if failed:
+                st.error("❌ Workflow failed")
+                st.session_state.processing_active = False
+                return
+            
+            # Check if completed
+            if current_state.get("current_step") == "completed":
+                finalize(current_state)
+            else:
+                # Paint whatever arrived after the last flush window
+                flush_ui()
                 
         except GeneratorExit:
             # Handle graceful generator closure - this is normal in Streamlit
@@ -117,10 +248,7 @@ def run_extraction_workflow(product_name: str, uploaded_files: dict):
             
             # Check if we have final results in current_state
             if current_state.get("current_step") == "completed":
-                st.session_state.processing_active = False
-                st.session_state.final_results = current_state
-                st.success("✅ Processing completed successfully!")
-                st.rerun()
+                finalize(current_state)
             else:
                 # Process was interrupted
                 st.warning("⚠️ Processing was interrupted. You may need to restart.")
@@ -131,10 +259,7 @@ def run_extraction_workflow(product_name: str, uploaded_files: dict):
             # Normal completion
             logger.info("Workflow streaming completed normally")
             if current_state.get("current_step") == "completed":
-                st.session_state.processing_active = False
-                st.session_state.final_results = current_state
-                st.success("✅ Processing completed successfully!")
-                st.rerun()
+                finalize(current_state)
             return
         
     except Exception as e:
@@ -142,40 +267,97 @@ def run_extraction_workflow(product_name: str, uploaded_files: dict):
         st.error(f"❌ Workflow failed: {str(e)}")
         st.session_state.processing_active = False
 
-def run_extraction_workflow_blocking(product_name: str, uploaded_files: dict):
-    """Run the extraction workflow without streaming - blocking approach"""
+def run_extraction_workflow_blocking(product_name: str, uploaded_files: dict, use_cache: bool = True):
+    """Run the extraction workflow without streaming - submitted to a background worker
+    
+    The script thread stays free; render_workflow_progress polls the job until it
+    finishes. Identical product/file inputs are served from stored results
+    unless use_cache is False (explicit re-runs want a fresh meta-ensemble).
+    """
     try:
-        # Create initial state
-        initial_state = create_initial_state(product_name, uploaded_files)
+        fingerprint = input_fingerprint(product_name, uploaded_files)
+        
+        # Same inputs as this session's last completed run - show those results directly
+        last_results = st.session_state.get("last_results")
+        if use_cache and last_results and last_results.get("_fp") == fingerprint:
+            logger.info(f"Reusing session results for product: {product_name}")
+            st.session_state.final_results = last_results
+            st.rerun()
+        
+        files_items = tuple(sorted(uploaded_files.items()))
         
-        # Show progress indicator
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        # Results persisted for these inputs by an earlier session skip the workflow entirely
+        if use_cache:
+            try:
+                stored_results = _stored_spec_extraction(product_name, files_items)
+            except _CacheMiss:
+                stored_results = None
+            if stored_results is not None:
+                logger.info(f"Reusing stored results for product: {product_name}")
+                stored_results["_fp"] = fingerprint
+                st.session_state.final_results = stored_results
+                st.session_state.last_results = stored_results
+                st.rerun()
         
-        status_text.text("🚀 Starting extraction workflow...")
-        progress_bar.progress(5)
+        # Create initial state - the worker updates it in place as runs progress
+        initial_state = build_initial_state(product_name, uploaded_files)
+        # Explicit re-runs must not be answered from cached LLM responses either
+        initial_state["response_cache"] = use_cache
         
-        # Run workflow without streaming
         logger.info(f"Starting blocking workflow for product: {product_name}")
         
-        from src.agents.workflow import run_spec_extraction
-        final_state = run_spec_extraction(initial_state)
-        
-        # Update progress to complete
-        progress_bar.progress(100)
-        status_text.text("✅ Processing completed!")
+        future = _executor().submit(_run_workflow_job, initial_state)
+        st.session_state.workflow_job = {
+            "future": future, "state": initial_state, "fingerprint": fingerprint,
+            "product_name": product_name, "files_items": files_items, "use_cache": use_cache
+        }
+        st.session_state.processing_active = True
         
-        # Store results
+    except Exception as e:
+        logger.error(f"Blocking workflow execution failed: {str(e)}")
+        st.error(f"❌ Workflow failed: {str(e)}")
         st.session_state.processing_active = False
-        st.session_state.final_results = final_state
+        return
+    
+    st.rerun()
+
+def render_workflow_progress():
+    """Show progress of the background workflow job and collect its result when done"""
+    job = st.session_state.workflow_job
+    future, state = job["future"], job["state"]
+    
+    if not future.done():
+        progress = state.get("progress_percentage", 0)
+        st.progress(progress / 100, text=f"{progress}% Complete")
+        st.caption(f"Current step: {state.get('current_step', 'initialization')}")
         
-        st.success("✅ Processing completed successfully!")
+        # Poll again shortly - the worker keeps running across reruns
+        time.sleep(WORKFLOW_POLL_INTERVAL)
         st.rerun()
-        
+    
+    st.session_state.workflow_job = None
+    st.session_state.processing_active = False
+    
+    try:
+        final_state = future.result()
     except Exception as e:
         logger.error(f"Blocking workflow execution failed: {str(e)}")
         st.error(f"❌ Workflow failed: {str(e)}")
-        st.session_state.processing_active = False
+        return
+    
+    # Only persist runs where every run produced a real table - a transient API error or
+    # an all-agents-failed run should not stick to these inputs
+    from src.agents.workflow import meta_ensemble_succeeded
+    succeeded = meta_ensemble_succeeded(final_state)
+    if job["use_cache"] and succeeded:
+        _stored_spec_extraction(job["product_name"], job["files_items"], final_state)
+    
+    # Store results, tagged with the inputs they were computed from; a failed run is shown
+    # but never reused, so submitting the same inputs again runs the workflow afresh
+    final_state["_fp"] = job["fingerprint"]
+    st.session_state.final_results = final_state
+    st.session_state.last_results = final_state if succeeded else None
+    st.rerun()
 
 def main():
     """Main application function"""
@@ -192,11 +374,9 @@ def main():
         st.markdown("## 🔄 Processing in Progress")
         st.info("The extraction workflow is running. Please wait for completion...")
         
-        # The processing status will be updated by run_extraction_workflow
-        # We just need placeholders here
-        st.empty()  # For status
-        st.empty()  # For progress
-        st.empty()  # For logs
+        # Background (non-streaming) runs are polled from here
+        if st.session_state.workflow_job is not None:
+            render_workflow_progress()
         
     elif st.session_state.final_results:
         # Show results view
@@ -213,13 +393,16 @@ def render_input_view():
     product_name = render_product_input()
     
     # File upload section
-    uploaded_files = render_upload_section()
+    uploaded_sources = render_upload_section()
     
     # Triangulation section
-    if uploaded_files:
+    if uploaded_sources:
         start_processing, workflow_mode = render_triangulation_section()
         
         if start_processing:
+            # Uploads are stored as bytes; decode them only now that a run is starting
+            uploaded_files = get_uploaded_files()
+            
             # Validate inputs
             is_valid, error_msg = validate_inputs(product_name, uploaded_files)
             
@@ -252,9 +435,8 @@ def render_results_view():
             st.session_state.restart_triangulation = False
             
             # Clear uploaded files
-            keys_to_remove = [key for key in st.session_state.keys() if key.startswith("uploaded_")]
-            for key in keys_to_remove:
-                del st.session_state[key]
+            for source_key in list(st.session_state.get("_uploaded_index", set())):
+                remove_uploaded_file(source_key)
             
             st.rerun()
     
@@ -276,21 +458,16 @@ def render_results_view():
         st.session_state.restart_triangulation = False
         
         # Get uploaded files from session state
-        uploaded_files = {}
-        for key in st.session_state.keys():
-            if key.startswith("uploaded_"):
-                source_key = key.replace("uploaded_", "")
-                file_data = st.session_state[key]
-                uploaded_files[source_key] = file_data["content"]
+        uploaded_files = get_uploaded_files()
         
         if uploaded_files:
             product_name = final_results.get("product_name", "")
             st.info("🔄 Restarting triangulation...")
-            run_extraction_workflow_blocking(product_name, uploaded_files)
+            run_extraction_workflow_blocking(product_name, uploaded_files, use_cache=False)
 
 if __name__ == "__main__":
     # Check for required environment variables
-    if not os.getenv("OPENAI_API_KEY"):
+    if not _HAS_OPENAI_KEY:
         st.error("""
         ❌ **OpenAI API Key Required**
         
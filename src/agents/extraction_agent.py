@@ -4,8 +4,9 @@ import time
 from typing import Dict, Any
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
-from ..utils.state import SpecExtractionState, DATASET_TYPE_MAPPING
+from ..utils.state import SpecExtractionState, DATASET_TYPE_MAPPING, STATUS_COMPLETED, STATUS_FAILED
 from ..utils.data_processor import DataProcessor
+from ..utils.file_store import load_file_content
 
 logger = logging.getLogger(__name__)
 
@@ -78,7 +79,7 @@ class ExtractionAgent:
                 "raw_data_count": total_row_count,
                 "extracted_specs": extracted_specs,
                 "processing_time": round(processing_time, 2),
-                "status": "completed",
+                "status": STATUS_COMPLETED,
                 "chunks_processed": len(data_chunks)
             }
             
@@ -95,7 +96,7 @@ class ExtractionAgent:
                 "raw_data_count": 0,
                 "extracted_specs": "",
                 "processing_time": time.time() - start_time,
-                "status": "failed",
+                "status": STATUS_FAILED,
                 "error": error_msg,
                 "chunks_processed": 0
             }
@@ -257,15 +258,15 @@ def process_search_keywords(state: SpecExtractionState) -> SpecExtractionState:
     result = agent.process_source(
         "search_keywords", 
         state["product_name"], 
-        state["uploaded_files"]["search_keywords"]
+        load_file_content(state["uploaded_files"]["search_keywords"])
     )
     
-    # Return updates to unique keys only
+    # Return updates to this source's entries only
     return {
-        "search_keywords_status": result["status"],
-        "search_keywords_result": result,
-        "search_keywords_error": result.get("error", ""),
-        "logs": [f"Agent search_keywords: {'Completed successfully' if result['status'] == 'completed' else 'Failed'} in {result['processing_time']:.2f}s"]
+        "statuses": {"search_keywords": result["status"]},
+        "results": {"search_keywords": result},
+        "errors": {"search_keywords": result.get("error", "")},
+        "logs": [f"Agent search_keywords: {'Completed successfully' if result['status'] == STATUS_COMPLETED else 'Failed'} in {result['processing_time']:.2f}s"]
     }
 
 def process_whatsapp_specs(state: SpecExtractionState) -> SpecExtractionState:
@@ -277,15 +278,15 @@ def process_whatsapp_specs(state: SpecExtractionState) -> SpecExtractionState:
     result = agent.process_source(
         "whatsapp_specs", 
         state["product_name"], 
-        state["uploaded_files"]["whatsapp_specs"]
+        load_file_content(state["uploaded_files"]["whatsapp_specs"])
     )
     
-    # Return updates to unique keys only
+    # Return updates to this source's entries only
     return {
-        "whatsapp_specs_status": result["status"],
-        "whatsapp_specs_result": result,
-        "whatsapp_specs_error": result.get("error", ""),
-        "logs": [f"Agent whatsapp_specs: {'Completed successfully' if result['status'] == 'completed' else 'Failed'} in {result['processing_time']:.2f}s"]
+        "statuses": {"whatsapp_specs": result["status"]},
+        "results": {"whatsapp_specs": result},
+        "errors": {"whatsapp_specs": result.get("error", "")},
+        "logs": [f"Agent whatsapp_specs: {'Completed successfully' if result['status'] == STATUS_COMPLETED else 'Failed'} in {result['processing_time']:.2f}s"]
     }
 
 def process_pns_calls(state: SpecExtractionState) -> SpecExtractionState:
@@ -297,15 +298,15 @@ def process_pns_calls(state: SpecExtractionState) -> SpecExtractionState:
     result = agent.process_source(
         "pns_calls", 
         state["product_name"], 
-        state["uploaded_files"]["pns_calls"]
+        load_file_content(state["uploaded_files"]["pns_calls"])
     )
     
-    # Return updates to unique keys only
+    # Return updates to this source's entries only
     return {
-        "pns_calls_status": result["status"],
-        "pns_calls_result": result,
-        "pns_calls_error": result.get("error", ""),
-        "logs": [f"Agent pns_calls: {'Completed successfully' if result['status'] == 'completed' else 'Failed'} in {result['processing_time']:.2f}s"]
+        "statuses": {"pns_calls": result["status"]},
+        "results": {"pns_calls": result},
+        "errors": {"pns_calls": result.get("error", "")},
+        "logs": [f"Agent pns_calls: {'Completed successfully' if result['status'] == STATUS_COMPLETED else 'Failed'} in {result['processing_time']:.2f}s"]
     }
 
 def process_rejection_comments(state: SpecExtractionState) -> SpecExtractionState:
@@ -317,15 +318,15 @@ def process_rejection_comments(state: SpecExtractionState) -> SpecExtractionStat
     result = agent.process_source(
         "rejection_comments", 
         state["product_name"], 
-        state["uploaded_files"]["rejection_comments"]
+        load_file_content(state["uploaded_files"]["rejection_comments"])
     )
     
-    # Return updates to unique keys only
+    # Return updates to this source's entries only
     return {
-        "rejection_comments_status": result["status"],
-        "rejection_comments_result": result,
-        "rejection_comments_error": result.get("error", ""),
-        "logs": [f"Agent rejection_comments: {'Completed successfully' if result['status'] == 'completed' else 'Failed'} in {result['processing_time']:.2f}s"]
+        "statuses": {"rejection_comments": result["status"]},
+        "results": {"rejection_comments": result},
+        "errors": {"rejection_comments": result.get("error", "")},
+        "logs": [f"Agent rejection_comments: {'Completed successfully' if result['status'] == STATUS_COMPLETED else 'Failed'} in {result['processing_time']:.2f}s"]
     }
 
 def process_lms_chats(state: SpecExtractionState) -> SpecExtractionState:
@@ -337,13 +338,13 @@ def process_lms_chats(state: SpecExtractionState) -> SpecExtractionState:
     result = agent.process_source(
         "lms_chats", 
         state["product_name"], 
-        state["uploaded_files"]["lms_chats"]
+        load_file_content(state["uploaded_files"]["lms_chats"])
     )
     
-    # Return updates to unique keys only
+    # Return updates to this source's entries only
     return {
-        "lms_chats_status": result["status"],
-        "lms_chats_result": result,
-        "lms_chats_error": result.get("error", ""),
-        "logs": [f"Agent lms_chats: {'Completed successfully' if result['status'] == 'completed' else 'Failed'} in {result['processing_time']:.2f}s"]
+        "statuses": {"lms_chats": result["status"]},
+        "results": {"lms_chats": result},
+        "errors": {"lms_chats": result.get("error", "")},
+        "logs": [f"Agent lms_chats: {'Completed successfully' if result['status'] == STATUS_COMPLETED else 'Failed'} in {result['processing_time']:.2f}s"]
     } 
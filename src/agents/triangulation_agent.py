@@ -1,26 +1,367 @@
 import os
+import json
 import logging
 import time
-import json
-from typing import Dict, Any, List
+import re
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, List, Callable, Tuple
+from openai import OpenAI
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage
-from ..utils.state import SpecExtractionState, get_agents_status, get_agent_results
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from ..utils.state import (
+    SpecExtractionState, get_agents_status, get_agent_results, SOURCE_NAMES,
+    STATUS_COMPLETED, STATUS_FAILED
+)
 
 logger = logging.getLogger(__name__)
 
+# Markdown table parsing: the first four non-empty cells of every row (leading pipe optional),
+# matched across the whole text in one pass; header and separator rows are filtered afterwards
+_TABLE_ROW_RE = re.compile(r'^[ \t]*\|?([^|\n]+)\|([^|\n]+)\|([^|\n]+)\|([^|\n]+)', re.MULTILINE)
+# Annotations the prompts' header wording leaks into cells, removed in one pass per cell
+_STRIP_RE = re.compile(r'\((?:based on data|consensus across runs)\)|in the market')
+
+# Extraction agent rows: "Rank | Specification | Option | Count" - a numeric rank skips headers
+_EXTRACTED_ROW_RE = re.compile(r'^[ \t]*\|?\s*\d+\s*\|([^|\n]+)\|([^|\n]+)\|', re.MULTILINE)
+
+# Specifications and options per specification kept when a single source is passed
+# through without triangulation, matching the limits the triangulation prompt asks for
+SINGLE_SOURCE_SPEC_LIMIT = 5
+SINGLE_SOURCE_OPTION_LIMIT = 5
+
+# Rows returned when a completion is not text at all (copied before use, never mutated)
+_PARSE_ERROR_ROW = {
+    'Rank': 1,
+    'Specification': 'Parse Error',
+    'Top Options': 'Could not parse result',
+    'Why it matters': 'Error in parsing',
+    'Impacts Pricing?': 'Unknown'
+}
+_ENSEMBLE_PARSE_ERROR_ROW = {
+    'Rank': 1,
+    'Specification': 'Ensemble Parse Error',
+    'Top Options': 'Could not parse ensemble result',
+    'Why it matters': 'Error in parsing',
+    'Impacts Pricing?': 'Unknown'
+}
+
+# Static instructions are kept free of per-request values and sent ahead of the data,
+# so repeated calls share an identical prefix that the provider's prompt cache can reuse
+ENSEMBLE_SYSTEM_PROMPT = """<role>
+You are a meta-ensemble specialist performing the final triangulation of 3 independent specification extraction runs for the target product.
+</role>
+
+<task>
+Analyze 3 triangulation results to identify the most consistent and reliable specifications of the target product through consensus validation.
+</task>
+
+<meta_ensemble_methodology>
+1. CONSISTENCY: find specifications present in several runs (3/3 highest confidence) and note option-name variations
+2. CONSOLIDATION: merge same-meaning specifications across runs (e.g. "Power" = "Power Rating" = "Capacity") and combine their options
+3. CONSENSUS: prefer options that recur across runs and confirm each specification's business relevance
+4. RANKING: weight by consensus - 3/3 runs 100%, 2/3 runs 70%, 1/3 runs 30%
+</meta_ensemble_methodology>
+
+<validation_rules>
+INCLUDE specifications that:
+- Appear in at least 2/3 runs OR have very high confidence in 1 run
+- Have consistent options across runs
+- Directly influence purchasing decisions for the target product
+- Represent tangible, measurable attributes
+
+EXCLUDE specifications that:
+- Appear in only 1/3 runs with low confidence
+- Have conflicting interpretations across runs
+- Are generic descriptors or location-specific
+- Duplicate the product name or are overly broad
+</validation_rules>
+
+<output_requirements>
+Create the final consensus specification table with EXACTLY this format:
+
+| Specification Name | Top Options (consensus across runs) | Why it matters in the market | Impacts Pricing? |
+
+1. Specification Name: Most consistent name across runs
+2. Top Options: 3-5 options with highest consensus (comma-separated), multiple distinct options per specification
+3. Why it matters: Market-focused business justification
+4. Impacts Pricing: "✅ Yes" or "❌ No", defensible from the consensus
+
+Limit to the 3-5 specifications with the strongest consensus and output only the table.
+</output_requirements>
+
+The target product and the run results to analyze follow in the next message."""
+
+TRIANGULATION_SYSTEM_PROMPT = """<role>
+You are a senior data triangulation specialist with expertise in multi-source B2B specification analysis. You excel at identifying patterns across diverse datasets and determining which specifications truly drive purchasing decisions for the target product.
+</role>
+
+<task>
+Analyze the independent extraction results to identify the most critical specifications of the target product through cross-validation and consensus building.
+</task>
+
+<triangulation_methodology>
+Give the top specifications that came from these datasets, not the datasets themselves.
+Merge semantically identical specification names and options; no specification name may repeat.
+Each specification needs at least 2 options, and neither its name nor its options may repeat words from the target product name.
+</triangulation_methodology>
+
+<validation_rules>
+INCLUDE specifications that:
+- Appear in 2+ sources OR have very high frequency in 1 source
+- Directly influence selection of the target product
+- Represent tangible product attributes
+
+EXCLUDE specifications that:
+- Are generic descriptors (e.g., "Good Quality", "Best")
+- Duplicate the product name (e.g., "Generator Type" for generators)
+- Represent brands/companies (unless brand is a key differentiator)
+- Are location-specific (unless critical for the product)
+</validation_rules>
+
+<output_requirements>
+Create a business-focused specification table with EXACTLY this format:
+
+| Specification Name | Top Options (based on data) | Why it matters in the market | Impacts Pricing? |
+
+1. Specification Name: Clear, professional terminology
+2. Top Options: 3-5 most frequent options, exactly as they appear in the data (comma-separated)
+3. Why it matters: Concise justification specific to the target product's market (buying behavior, compatibility, regulations)
+4. Impacts Pricing: "✅ Yes" or "❌ No", logical and defensible
+
+Limit to the 3-5 specifications that best differentiate products and output only the table.
+</output_requirements>
+
+<example_output>
+| Material | Aluminium, Steel, Stainless Steel, Cast Iron | Affects durability, weight, and corrosion resistance - key factors in industrial applications | ✅ Yes |
+| Phase Configuration | Single Phase, Three Phase | Must match facility electrical infrastructure - non-negotiable compatibility requirement | ✅ Yes |
+</example_output>
+
+The target product and the datasets to analyze follow in the next message."""
+
+# Per-request messages: only these small templates are filled on each call
+ENSEMBLE_INPUT_TEMPLATE = """<target_product>
+{product_name}
+</target_product>
+
+<run_results>
+{ensemble_data}
+</run_results>"""
+
+TRIANGULATION_INPUT_TEMPLATE = """<target_product>
+{product_name}
+</target_product>
+
+<datasets_to_analyze count="{count}">
+{datasets_text}
+</datasets_to_analyze>"""
+
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
+# Per-run triangulation only merges a few already-structured tables, so it defaults to the
+# faster nano model; the final meta-ensemble keeps OPENAI_MODEL where quality matters most
+OPENAI_TRIANGULATION_MODEL = os.getenv("OPENAI_TRIANGULATION_MODEL", "gpt-4.1-nano")
+
+# Shared LLM clients - the node functions build a new agent per invocation, but the
+# underlying client (HTTP pool, auth setup) is created once per model and reused
+_llm_clients: Dict[str, ChatOpenAI] = {}
+# The meta-ensemble runs call this concurrently, so get-or-create happens under a lock
+_llm_clients_lock = threading.Lock()
+
+def get_llm(model: str) -> ChatOpenAI:
+    """Get or create the shared ChatOpenAI client for a model"""
+    with _llm_clients_lock:
+        llm = _llm_clients.get(model)
+        if llm is None:
+            llm = _llm_clients[model] = ChatOpenAI(model=model, temperature=0.1)
+    return llm
+
+# Batch API settings for bulk (non-interactive) runs: half the cost, results within the window
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_POLL_INTERVAL = float(os.getenv("OPENAI_BATCH_POLL_INTERVAL", "30"))
+# A workflow worker waits at most this long before cancelling the batch and failing the run
+BATCH_MAX_WAIT = float(os.getenv("OPENAI_BATCH_MAX_WAIT", "3600"))
+
+_batch_client = None
+
+def get_batch_client() -> OpenAI:
+    """Get or create the shared OpenAI client used for Batch API jobs"""
+    global _batch_client
+    if _batch_client is None:
+        _batch_client = OpenAI()
+    return _batch_client
+
+def batch_completion(model: str, messages: List[BaseMessage], custom_id: str) -> str:
+    """Run one chat completion through the OpenAI Batch API and wait for its result"""
+    client = get_batch_client()
+    request = {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": model,
+            "temperature": 0.1,
+            "messages": [
+                {"role": "system" if isinstance(m, SystemMessage) else "user", "content": m.content}
+                for m in messages
+            ]
+        }
+    }
+    
+    input_file = client.files.create(
+        file=(f"{custom_id}.jsonl", json.dumps(request).encode("utf-8")),
+        purpose="batch"
+    )
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window=BATCH_COMPLETION_WINDOW
+    )
+    logger.info(f"Submitted batch {batch.id} for {custom_id}")
+    
+    deadline = time.monotonic() + BATCH_MAX_WAIT
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        if time.monotonic() >= deadline:
+            client.batches.cancel(batch.id)
+            raise TimeoutError(f"Batch {batch.id} not finished after {BATCH_MAX_WAIT:.0f}s - cancelled")
+        time.sleep(BATCH_POLL_INTERVAL)
+        batch = client.batches.retrieve(batch.id)
+    
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+    
+    response = json.loads(client.files.content(batch.output_file_id).text.splitlines()[0])["response"]
+    if response["status_code"] != 200:
+        raise RuntimeError(f"Batch {batch.id} request failed with status {response['status_code']}")
+    return response["body"]["choices"][0]["message"]["content"]
+
+# Completed responses keyed by a hash of model + prompt, so identical re-runs can skip the LLM
+# call; opt-in only, since the per-run triangulations must stay independent samples
+RESPONSE_CACHE_SIZE = 128
+_response_cache: "OrderedDict[str, str]" = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+def _prompt_key(llm: ChatOpenAI, messages: List[BaseMessage]) -> str:
+    """Hash the model name and message contents into a response cache key"""
+    digest = hashlib.sha256(llm.model_name.encode("utf-8"))
+    for message in messages:
+        digest.update(b"\0" + message.type.encode("utf-8") + b"\0" + message.content.encode("utf-8"))
+    return digest.hexdigest()
+
+def complete_table(llm: ChatOpenAI, messages: List[BaseMessage],
+                   parse: Callable[[str], List[Dict[str, Any]]],
+                   use_cache: bool = False) -> Tuple[str, List[Dict[str, Any]]]:
+    """Run a completion and parse its table rows
+    
+    Returns the full response text and the parsed rows. With use_cache, a prompt answered
+    before is served from the response cache without calling the LLM, and new responses are
+    added to it.
+    """
+    if use_cache:
+        key = _prompt_key(llm, messages)
+        with _response_cache_lock:
+            cached = _response_cache.get(key)
+            if cached is not None:
+                _response_cache.move_to_end(key)
+        if cached is not None:
+            logger.info("Serving triangulation response from cache")
+            return cached, parse(cached)
+    
+    response = llm.invoke(messages).content
+    if use_cache:
+        with _response_cache_lock:
+            _response_cache[key] = response
+            if len(_response_cache) > RESPONSE_CACHE_SIZE:
+                _response_cache.popitem(last=False)
+    return response, parse(response)
+
+def _parse_spec_table(result: str, *, error_row: Dict[str, Any] = _PARSE_ERROR_ROW) -> List[Dict[str, Any]]:
+    """Parse markdown table rows from an LLM response
+    
+    Shared by the triangulation and meta-ensemble agents; error_row is returned for output
+    that is not text at all.
+    """
+    if not isinstance(result, str):
+        logger.error(f"Unexpected LLM output type: {type(result).__name__}")
+        return [dict(error_row)]
+    # Prose or blank responses carry no table cells, so there is nothing to parse
+    if '|' not in result:
+        return []
+    
+    table_data = []
+    rank = 1
+    
+    # Look for table rows anywhere in the result
+    for match in _TABLE_ROW_RE.finditer(result):
+        # First 4 cells: spec, options, why, pricing
+        parts = [part.strip() for part in match.groups()]
+        
+        # Skip headers and separator lines
+        if 'Specification Name' in match.group(0) or parts[0].startswith('-'):
+            continue
+        
+        table_data.append({
+            'Rank': rank,
+            'Specification': parts[0],
+            'Top Options': _STRIP_RE.sub('', parts[1]).strip(),
+            'Why it matters': _STRIP_RE.sub('', parts[2]).strip(),
+            'Impacts Pricing?': parts[3]
+        })
+        rank += 1
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Added row {rank-1}: {parts[0]}")
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Successfully parsed {len(table_data)} table rows")
+    return table_data
+
+def _specs_to_table(extracted_specs: str) -> List[Dict[str, Any]]:
+    """Convert one extraction agent's ranked spec/option rows into triangulation table rows
+    
+    Options are grouped under their specification in rank order, and the most frequent
+    specifications and options are kept. The extraction output carries no market rationale
+    or pricing assessment, so those cells are left blank rather than filled with placeholders.
+    """
+    options: Dict[str, List[str]] = {}
+    for match in _EXTRACTED_ROW_RE.finditer(extracted_specs):
+        spec, option = match.group(1).strip(), match.group(2).strip()
+        if spec not in options:
+            if len(options) == SINGLE_SOURCE_SPEC_LIMIT:
+                continue
+            options[spec] = []
+        if option not in options[spec] and len(options[spec]) < SINGLE_SOURCE_OPTION_LIMIT:
+            options[spec].append(option)
+    
+    return [{
+        'Rank': rank,
+        'Specification': spec,
+        'Top Options': ", ".join(spec_options),
+        'Why it matters': '',
+        'Impacts Pricing?': ''
+    } for rank, (spec, spec_options) in enumerate(options.items(), 1)]
+
+def _table_to_markdown(table_data: List[Dict[str, Any]]) -> str:
+    """Render triangulation table rows in the same markdown layout the LLM returns"""
+    lines = [
+        "| Specification Name | Top Options (based on data) | Why it matters in the market | Impacts Pricing? |",
+        "|---|---|---|---|"
+    ]
+    lines.extend(
+        f"| {row['Specification']} | {row['Top Options']} | {row['Why it matters']} | {row['Impacts Pricing?']} |"
+        for row in table_data
+    )
+    return "\n".join(lines)
+
 class MetaEnsembleAgent:
     """Agent for performing final ensemble triangulation of multiple runs"""
     
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model=os.getenv("OPENAI_MODEL", "gpt-4.1-mini"),
-            temperature=0.1
-        )
+        self.llm = get_llm(OPENAI_MODEL)
     
     def ensemble_triangulate(self, state: SpecExtractionState) -> SpecExtractionState:
         """Perform final ensemble triangulation of 3 run results"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             logger.info("Starting meta-ensemble triangulation")
@@ -30,24 +371,23 @@ class MetaEnsembleAgent:
                 raise ValueError(f"Expected 3 run results, got {len(run_results)}")
             
             # Build ensemble prompt
-            prompt = self._build_ensemble_prompt(
+            messages = self._build_ensemble_prompt(
                 product_name=state["product_name"],
                 run_results=run_results
             )
             
             logger.info("Sending meta-ensemble triangulation request")
             
-            # Call LLM for final ensemble
-            response = self.llm.invoke([HumanMessage(content=prompt)])
-            final_result = response.content
-            
-            # Parse the final result into table format
-            final_table = self._parse_ensemble_result(final_result)
+            # Call LLM for final ensemble and parse its table rows
+            final_result, final_table = complete_table(
+                self.llm, messages, self._parse_ensemble_result,
+                use_cache=state.get("response_cache", False)
+            )
             
             # Calculate processing time
-            processing_time = time.time() - start_time
+            processing_time = time.perf_counter() - start_time
             
-            logger.info(f"Meta-ensemble triangulation completed in {processing_time:.2f}s")
+            logger.info("Meta-ensemble triangulation completed in %.2fs", processing_time)
             
             return {
                 "final_ensemble_result": final_result,
@@ -66,166 +406,35 @@ class MetaEnsembleAgent:
                 "logs": [f"Meta-ensemble triangulation failed: {error_msg}"]
             }
     
-    def _build_ensemble_prompt(self, product_name: str, run_results: List[Dict[str, Any]]) -> str:
-        """Build prompt for final ensemble triangulation"""
+    def _build_ensemble_prompt(self, product_name: str, run_results: List[Dict[str, Any]]) -> List[BaseMessage]:
+        """Build messages for final ensemble triangulation (static instructions first for prompt caching)"""
         
         # Prepare run results for analysis
-        ensemble_data = ""
-        for i, run_result in enumerate(run_results, 1):
-            ensemble_data += f"\n=== RUN {i} TRIANGULATION RESULT ===\n"
-            ensemble_data += run_result.get("triangulated_result", "No result")
-            ensemble_data += "\n"
-        
-        prompt = f"""<role>
-You are a meta-ensemble specialist performing the final triangulation of 3 independent specification extraction runs for {product_name}.
-</role>
-
-<task>
-Analyze 3 triangulation results to identify the most consistent and reliable {product_name} specifications through consensus validation.
-</task>
-
-<meta_ensemble_methodology>
-Apply this proven consensus-building process:
-
-STEP 1 - CONSISTENCY ANALYSIS:
-• Identify specifications that appear in multiple runs (2/3 or 3/3)
-• Higher confidence for specs appearing in all 3 runs
-• Note variations in option names across runs
-
-STEP 2 - SEMANTIC CONSOLIDATION:
-• Merge specifications with same meaning across runs:
-  - "Power" = "Power Rating" = "Capacity"
-  - "Phase" = "Phase Type" = "Phase Configuration"
-• Combine option lists from all runs for comprehensive coverage
-
-STEP 3 - FREQUENCY CONSENSUS:
-• For specs appearing in multiple runs, use the most consistent options
-• Prioritize options that appear across multiple runs
-• Validate business relevance of each specification
-
-STEP 4 - CONFIDENCE RANKING:
-Rank specifications by consensus score:
-• Appears in 3/3 runs: Highest confidence (weight: 100%)
-• Appears in 2/3 runs: Medium confidence (weight: 70%)
-• Appears in 1/3 runs: Low confidence (weight: 30%)
-</meta_ensemble_methodology>
-
-<validation_rules>
-INCLUDE specifications that:
-✓ Appear in at least 2/3 runs OR have very high confidence in 1 run
-✓ Have consistent options across runs
-✓ Directly influence {product_name} purchasing decisions
-✓ Represent tangible, measurable attributes
-
-EXCLUDE specifications that:
-✗ Appear in only 1/3 runs with low confidence
-✗ Have conflicting interpretations across runs
-✗ Are generic descriptors or location-specific
-✗ Duplicate the product name or are overly broad
-</validation_rules>
-
-<run_results>
-{ensemble_data}
-</run_results>
-
-<output_requirements>
-Create the final consensus specification table with EXACTLY this format:
-
-| Specification Name | Top Options (consensus across runs) | Why it matters in the market | Impacts Pricing? |
-
-Requirements:
-1. Specification Name: Most consistent name across runs
-2. Top Options: 3-5 options with highest consensus (comma-separated)
-3. Why it matters: Business justification based on market analysis
-4. Impacts Pricing: "✅ Yes" or "❌ No" based on consensus assessment
-
-CRITICAL INSTRUCTIONS:
-• Limit to 3-5 highest confidence specifications
-• Use options that appeared in multiple runs when possible
-• Ensure each specification has multiple distinct options
-• Focus on specifications with strong consensus
-• Provide clear business justifications
-</output_requirements>
-
-<final_validation>
-Before submitting, ensure:
-□ All specifications have strong consensus (2/3 or 3/3 runs)
-□ Options represent the best consensus across runs
-□ Business justifications are market-focused
-□ Pricing impact assessment is defensible
-□ Output matches the required table format exactly
-</final_validation>"""
+        ensemble_data = "".join(
+            f"\n=== RUN {i} TRIANGULATION RESULT ===\n{run_result.get('triangulated_result', 'No result')}\n"
+            for i, run_result in enumerate(run_results, 1)
+        )
         
-        return prompt
+        return [
+            SystemMessage(content=ENSEMBLE_SYSTEM_PROMPT),
+            HumanMessage(content=ENSEMBLE_INPUT_TEMPLATE.format(
+                product_name=product_name, ensemble_data=ensemble_data
+            ))
+        ]
     
     def _parse_ensemble_result(self, result: str) -> List[Dict[str, Any]]:
         """Parse ensemble result into structured table format"""
-        try:
-            lines = result.strip().split('\n')
-            table_data = []
-            rank = 1
-            
-            logger.info(f"Processing {len(lines)} lines for ensemble parsing")
-            
-            for i, line in enumerate(lines):
-                line = line.strip()
-                
-                # Skip empty lines, headers, and separator lines
-                if not line:
-                    continue
-                if 'Specification Name' in line:
-                    continue
-                if line.startswith('|--') or line.startswith('|-'):
-                    continue
-                if line.count('|') < 3:
-                    continue
-                
-                # Look for table rows
-                if '|' in line:
-                    cleaned_line = line
-                    if cleaned_line.startswith('|'):
-                        cleaned_line = cleaned_line[1:]
-                    if cleaned_line.endswith('|'):
-                        cleaned_line = cleaned_line[:-1]
-                    
-                    parts = [part.strip() for part in cleaned_line.split('|')]
-                    
-                    if len(parts) >= 4:
-                        table_data.append({
-                            'Rank': rank,
-                            'Specification': parts[0],
-                            'Top Options': parts[1].replace('(consensus across runs)', '').strip(),
-                            'Why it matters': parts[2].replace('in the market', '').strip(),
-                            'Impacts Pricing?': parts[3]
-                        })
-                        rank += 1
-                        logger.info(f"Added ensemble row {rank-1}: {parts[0]}")
-            
-            logger.info(f"Successfully parsed {len(table_data)} ensemble table rows")
-            return table_data
-            
-        except Exception as e:
-            logger.error(f"Error parsing ensemble result: {e}")
-            return [{
-                'Rank': 1,
-                'Specification': 'Ensemble Parse Error',
-                'Top Options': 'Could not parse ensemble result',
-                'Why it matters': 'Error in parsing',
-                'Impacts Pricing?': 'Unknown'
-            }]
+        return _parse_spec_table(result, error_row=_ENSEMBLE_PARSE_ERROR_ROW)
 
 class TriangulationAgent:
     """Agent for triangulating results from all sources"""
     
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model=os.getenv("OPENAI_MODEL", "gpt-4.1-mini"),
-            temperature=0.1
-        )
+        self.llm = get_llm(OPENAI_TRIANGULATION_MODEL)
     
     def triangulate_results(self, state: SpecExtractionState) -> SpecExtractionState:
         """Triangulate results from all completed agents"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             logger.info("Starting triangulation process")
@@ -234,12 +443,25 @@ class TriangulationAgent:
             agent_results = get_agent_results(state)
             completed_agents = {
                 source: result for source, result in agent_results.items()
-                if result.get("status") == "completed"
+                if result.get("status") == STATUS_COMPLETED
             }
             
             if not completed_agents:
                 raise ValueError("No completed agent results to triangulate")
             
+            # With a single source there is nothing to cross-validate - its extraction is the result
+            if len(completed_agents) == 1:
+                source, result = next(iter(completed_agents.items()))
+                triangulated_table = _specs_to_table(result["extracted_specs"])
+                logger.info(f"Only {source} completed, skipping triangulation LLM call")
+                return {
+                    "triangulated_result": _table_to_markdown(triangulated_table),
+                    "triangulated_table": triangulated_table,
+                    "current_step": "completed",
+                    "progress_percentage": 100,
+                    "logs": [f"Only one source completed ({source}), used its specifications directly"]
+                }
+            
             # Prepare datasets for triangulation prompt
             datasets = []
             all_dataset_outputs = {}
@@ -255,7 +477,7 @@ class TriangulationAgent:
                 all_dataset_outputs[source] = result["extracted_specs"]
             
             # Build triangulation prompt using multi-agent consensus and validation techniques
-            prompt = self._build_triangulation_prompt(
+            messages = self._build_triangulation_prompt(
                 product_name=state["product_name"],
                 datasets=datasets,
                 all_dataset_outputs=all_dataset_outputs
@@ -263,23 +485,31 @@ class TriangulationAgent:
             
             logger.info(f"Sending triangulation request for {len(datasets)} datasets")
             
-            # Call LLM for triangulation
-            response = self.llm.invoke([HumanMessage(content=prompt)])
-            triangulated_result = response.content
+            if state.get("batch_mode"):
+                # Bulk runs: go through the Batch API at half the cost, trading away latency
+                triangulated_result = batch_completion(
+                    self.llm.model_name, messages,
+                    f"triangulation-run{state.get('current_run', 0)}-{uuid.uuid4().hex[:8]}"
+                )
+                triangulated_table = self._parse_triangulation_result(triangulated_result)
+            else:
+                # Call LLM for triangulation and parse its table rows for export
+                triangulated_result, triangulated_table = complete_table(
+                    self.llm, messages, self._parse_triangulation_result
+                )
             
             # Debug: Log the raw LLM output
-            logger.info(f"Raw LLM triangulation output: {triangulated_result}")
-            
-            # Parse the triangulated result into table format for export
-            triangulated_table = self._parse_triangulation_result(triangulated_result)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Raw LLM triangulation output: {triangulated_result}")
             
             # Debug: Log the parsed table
-            logger.info(f"Parsed triangulation table: {triangulated_table}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Parsed triangulation table: {triangulated_table}")
             
             # Calculate processing time
-            processing_time = time.time() - start_time
+            processing_time = time.perf_counter() - start_time
             
-            logger.info(f"Triangulation completed in {processing_time:.2f}s")
+            logger.info("Triangulation completed in %.2fs", processing_time)
             
             # Return only the keys this function should update
             return {
@@ -300,151 +530,28 @@ class TriangulationAgent:
                 "logs": [f"Triangulation failed: {error_msg}"]
             }
     
-    def _build_triangulation_prompt(self, product_name: str, datasets: List[Dict], all_dataset_outputs: Dict) -> str:
-        """Build triangulation prompt using multi-agent consensus and validation techniques"""
+    def _build_triangulation_prompt(self, product_name: str, datasets: List[Dict], all_dataset_outputs: Dict) -> List[BaseMessage]:
+        """Build triangulation messages using multi-agent consensus and validation techniques
         
-        # Research-backed triangulation prompt with enhanced accuracy
-        prompt = f"""<role>
-You are a senior data triangulation specialist with expertise in multi-source B2B specification analysis. You excel at identifying patterns across diverse datasets and determining which specifications truly drive purchasing decisions for {product_name}.
-</role>
-
-<task>
-Analyze {len(datasets)} independent extraction results to identify the most critical {product_name} specifications through cross-validation and consensus building.
-</task>
-
-<triangulation_methodology>
-
-For the triangulation, give me results and top specifications that came from these datasets. Don't give 
-the dataset itself in your response.
-Merge Semantically same Specification options and name. Duplicate Specifications name should not be 
-there. At least 2 options should be there to display any specification important and Specification name 
-and Specification options should not be same or contain same words as in {product_name}.
-
-</triangulation_methodology>
-
-<validation_rules>
-INCLUDE specifications that:
-✓ Appear in 2+ sources OR have very high frequency in 1 source
-✓ Have at least 2 meaningful options
-✓ Directly influence {product_name} selection
-✓ Represent tangible product attributes
-
-EXCLUDE specifications that:
-✗ Are generic descriptors (e.g., "Good Quality", "Best")
-✗ Duplicate the product name (e.g., "Generator Type" for generators)
-✗ Represent brands/companies (unless brand is a key differentiator)
-✗ Are location-specific (unless critical for the product)
-</validation_rules>
-
-<datasets_to_analyze>
-{json.dumps(all_dataset_outputs, indent=2)}
-</datasets_to_analyze>
-
-<output_requirements>
-Create a business-focused specification table with EXACTLY this format:
-
-| Specification Name | Top Options (based on data) | Why it matters in the market | Impacts Pricing? |
-
-Requirements for each row:
-1. Specification Name: Clear, professional terminology
-2. Top Options: 3-5 most frequent options from the data (comma-separated)
-3. Why it matters: Concise business justification (buying behavior, compatibility, regulations)
-4. Impacts Pricing: "✅ Yes" or "❌ No" based on market analysis
-
-CRITICAL INSTRUCTIONS:
-• Limit to 3-5 most impactful specifications
-• Use exact options from the data (don't invent new ones)
-• Ensure each specification has multiple real options
-• Focus on specifications that differentiate products
-• Keep explanations concise and business-oriented
-</output_requirements>
-
-<example_output>
-| Material | Aluminium, Steel, Stainless Steel, Cast Iron | Affects durability, weight, and corrosion resistance - key factors in industrial applications | ✅ Yes |
-| Power Rating | 5 KVA, 7.5 KVA, 10 KVA, 15 KVA | Determines suitable applications and load capacity - primary selection criteria | ✅ Yes |
-| Phase Configuration | Single Phase, Three Phase | Must match facility electrical infrastructure - non-negotiable compatibility requirement | ✅ Yes |
-</example_output>
-
-<final_validation>
-Before submitting, ensure:
-□ All options come directly from the provided datasets
-□ Specifications represent consensus across multiple sources
-□ Business justifications are specific to {product_name} market
-□ Pricing impact assessment is logical and defensible
-□ Output matches the required table format exactly
-</final_validation>"""
+        The instructions are a fixed system message and only the product and dataset
+        outputs vary, so the provider can reuse the cached prompt prefix across calls.
+        """
+        # Each source's extracted table verbatim under a [source] tag - JSON-encoding the
+        # tables escaped every newline and quote, costing tokens for no extra structure
+        datasets_text = "\n\n".join(
+            f"[{source}]\n{specs.strip()}" for source, specs in all_dataset_outputs.items()
+        )
         
-        return prompt
+        return [
+            SystemMessage(content=TRIANGULATION_SYSTEM_PROMPT),
+            HumanMessage(content=TRIANGULATION_INPUT_TEMPLATE.format(
+                product_name=product_name, count=len(datasets), datasets_text=datasets_text
+            ))
+        ]
     
     def _parse_triangulation_result(self, result: str) -> List[Dict[str, Any]]:
         """Parse triangulation result into structured table format for export"""
-        try:
-            lines = result.strip().split('\n')
-            table_data = []
-            rank = 1
-            
-            # Debug: log each line being processed
-            logger.info(f"Processing {len(lines)} lines for parsing")
-            
-            # Look for table format in the result
-            for i, line in enumerate(lines):
-                line = line.strip()
-                
-                # Debug: log the line being processed
-                logger.info(f"Line {i}: '{line}' - Pipe count: {line.count('|')}")
-                
-                # Skip empty lines, headers, and separator lines
-                if not line:
-                    continue
-                if 'Specification Name' in line:
-                    continue
-                if line.startswith('|--') or line.startswith('|-'):
-                    continue
-                if line.count('|') < 3:
-                    continue
-                
-                # Look for table rows (containing | separator)
-                if '|' in line:
-                    # Clean up the line
-                    cleaned_line = line
-                    if cleaned_line.startswith('|'):
-                        cleaned_line = cleaned_line[1:]
-                    if cleaned_line.endswith('|'):
-                        cleaned_line = cleaned_line[:-1]
-                    
-                    parts = [part.strip() for part in cleaned_line.split('|')]
-                    
-                    # Debug: log the parts
-                    logger.info(f"Parsed parts: {parts} (count: {len(parts)})")
-                    
-                    # Ensure we have at least 4 parts (spec, options, why, pricing)
-                    if len(parts) >= 4:
-                        # Map to competitor's format
-                        table_data.append({
-                            'Rank': rank,
-                            'Specification': parts[0],  # Changed from 'Specification Name'
-                            'Top Options': parts[1].replace('(based on data)', '').strip(),  # Remove "(based on data)"
-                            'Why it matters': parts[2].replace('in the market', '').strip(),  # Remove "in the market"
-                            'Impacts Pricing?': parts[3]  # Changed to include question mark
-                        })
-                        rank += 1
-                        logger.info(f"Successfully added row {rank-1}: {parts[0]}")
-            
-            # Debug log
-            logger.info(f"Successfully parsed {len(table_data)} table rows")
-            
-            return table_data
-            
-        except Exception as e:
-            logger.error(f"Error parsing triangulation result: {e}")
-            # Return a fallback structure with competitor's format
-            return [{
-                'Rank': 1,
-                'Specification': 'Parse Error',
-                'Top Options': 'Could not parse result',
-                'Why it matters': 'Error in parsing',
-                'Impacts Pricing?': 'Unknown'
-            }]
+        return _parse_spec_table(result, error_row=_PARSE_ERROR_ROW)
 
 
 def triangulate_all_results(state: SpecExtractionState) -> SpecExtractionState:
@@ -462,17 +569,15 @@ def check_all_agents_completed(state: SpecExtractionState) -> str:
     uploaded_sources = set(state["uploaded_files"].keys())
     agents_status = get_agents_status(state)
     
-    completed_sources = {
-        source for source, status in agents_status.items()
-        if status == "completed"
-    }
-    failed_sources = {
-        source for source, status in agents_status.items()
-        if status == "failed"
-    }
+    # Partition finished sources in a single pass over the statuses
+    finished = {STATUS_COMPLETED: set(), STATUS_FAILED: set()}
+    for source, status in agents_status.items():
+        if status in finished:
+            finished[status].add(source)
+    completed_sources = finished[STATUS_COMPLETED]
     
     # If all uploaded sources are either completed or failed, we can proceed
-    if uploaded_sources <= (completed_sources | failed_sources):
+    if uploaded_sources <= (completed_sources | finished[STATUS_FAILED]):
         if completed_sources:  # At least one completed successfully
             return "triangulate"
         else:  # All failed
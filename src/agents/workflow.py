@@ -1,10 +1,14 @@
 import logging
 import copy
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 
-from ..utils.state import SpecExtractionState, get_agents_status, get_agent_results, get_errors
+from ..utils.state import (
+    SpecExtractionState, SOURCE_NAMES, STATUS_COMPLETED, STATUS_FAILED, initial_statuses,
+    get_agents_status, get_agent_results, get_errors
+)
 from .extraction_agent import (
     process_search_keywords,
     process_whatsapp_specs,
@@ -16,6 +20,21 @@ from .triangulation_agent import triangulate_all_results, check_all_agents_compl
 
 logger = logging.getLogger(__name__)
 
+def run_succeeded(run_state: Dict[str, Any]) -> bool:
+    """A run counts only if its agents got through to a completed triangulation with table rows"""
+    # The all-failed path also sets a truthy triangulated_result, so the table is what decides
+    return bool(run_state) and run_state.get("current_step") == "completed" and bool(run_state.get("triangulated_table"))
+
+def meta_ensemble_succeeded(state: Dict[str, Any]) -> bool:
+    """Every run produced a real triangulated table and the final ensemble completed"""
+    run_results = state.get("run_results") or []
+    return (
+        state.get("current_step") == "meta_ensemble_completed"
+        and bool(state.get("final_ensemble_table"))
+        and bool(run_results)
+        and all(run.get("triangulated_table") for run in run_results)
+    )
+
 class MetaEnsembleWorkflow:
     """Meta-ensemble workflow that runs the extraction process 3 times and performs final ensemble triangulation"""
     
@@ -23,59 +42,42 @@ class MetaEnsembleWorkflow:
         self.single_workflow = SpecExtractionWorkflow()
     
     def run_meta_ensemble(self, state: SpecExtractionState, config: Dict[str, Any] = None) -> SpecExtractionState:
-        """Run the meta-ensemble process: 3 sequential runs + final ensemble"""
+        """Run the meta-ensemble process: 3 concurrent runs + final ensemble"""
         try:
             logger.info(f"Starting meta-ensemble for product: {state['product_name']}")
             
             # Initialize meta-ensemble state
             state["current_step"] = "meta_ensemble_starting"
             state["progress_percentage"] = 5
-            state["logs"] = state["logs"] + ["Meta-ensemble started - running 3 sequential extractions"]
-            
-            run_results = []
-            
-            # Run the extraction process 3 times
-            for run_num in range(1, 4):
-                logger.info(f"Starting meta-ensemble run {run_num}/3")
-                
-                # Update state for current run
-                state["current_run"] = run_num
-                state["current_step"] = f"meta_ensemble_run_{run_num}"
-                state["progress_percentage"] = 5 + (run_num - 1) * 30  # 5%, 35%, 65%
-                state["logs"] = state["logs"] + [f"Starting run {run_num}/3"]
-                
-                # Create a fresh copy of state for this run (reset agent results)
-                run_state = self._prepare_run_state(state)
+            state["logs"] = state["logs"] + ["Meta-ensemble started - running 3 concurrent extractions"]
+            
+            # The runs are independent (each gets its own state copy and checkpoint thread),
+            # so they are dispatched together and wall time is bounded by the slowest run;
+            # each run state carries its own current_run
+            state["current_step"] = "meta_ensemble_runs"
+            state["logs"] = state["logs"] + [f"Starting run {run_num}/3" for run_num in range(1, 4)]
+            
+            run_results_by_num = {}
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = {
+                    executor.submit(
+                        self.single_workflow.run_workflow,
+                        self._prepare_run_state(state, run_num),
+                        self._run_config(config, run_num)
+                    ): run_num
+                    for run_num in range(1, 4)
+                }
                 
-                # Run single workflow
-                if config is None:
-                    config = {"configurable": {"thread_id": f"meta_run_{run_num}"}}
-                else:
-                    config["configurable"]["thread_id"] = f"meta_run_{run_num}"
-                
-                run_result = self.single_workflow.run_workflow(run_state, config)
-                
-                # Store the triangulation result
-                if run_result.get("triangulated_result"):
-                    run_results.append({
-                        "run_number": run_num,
-                        "triangulated_result": run_result["triangulated_result"],
-                        "triangulated_table": run_result.get("triangulated_table", []),
-                        "agent_results": get_agent_results(run_result)
-                    })
-                    logger.info(f"Completed meta-ensemble run {run_num}/3 successfully")
-                else:
-                    logger.warning(f"Meta-ensemble run {run_num}/3 failed or had no results")
-                    run_results.append({
-                        "run_number": run_num,
-                        "triangulated_result": "Run failed",
-                        "triangulated_table": [],
-                        "agent_results": {}
-                    })
-                
-                # Update progress
-                state["progress_percentage"] = 5 + run_num * 30  # 35%, 65%, 95%
-                state["logs"] = state["logs"] + [f"Completed run {run_num}/3"]
+                for completed, future in enumerate(as_completed(futures), 1):
+                    run_num = futures[future]
+                    run_results_by_num[run_num] = self._collect_run_result(run_num, future.result())
+                    
+                    # Update progress
+                    state["progress_percentage"] = 5 + completed * 30  # 35%, 65%, 95%
+                    state["logs"] = state["logs"] + [f"Completed run {run_num}/3"]
+            
+            run_results = [run_results_by_num[run_num] for run_num in range(1, 4)]
+            state["current_run"] = len(run_results)
             
             # Store all run results
             state["run_results"] = run_results
@@ -127,17 +129,11 @@ class MetaEnsembleWorkflow:
                 yield {f"run_{run_num}_start": state}
                 
                 # Create a fresh copy of state for this run
-                run_state = self._prepare_run_state(state)
-                
-                # Stream single workflow
-                if config is None:
-                    config = {"configurable": {"thread_id": f"meta_run_{run_num}"}}
-                else:
-                    config["configurable"]["thread_id"] = f"meta_run_{run_num}"
+                run_state = self._prepare_run_state(state, run_num)
                 
                 # Stream the run and collect final result
                 run_result = None
-                for chunk in self.single_workflow.stream_workflow(run_state, config):
+                for chunk in self.single_workflow.stream_workflow(run_state, self._run_config(config, run_num)):
                     # Forward the chunk with run prefix
                     yield {f"run_{run_num}_progress": chunk}
                     # Keep track of the latest state
@@ -145,22 +141,7 @@ class MetaEnsembleWorkflow:
                         run_result = chunk
                 
                 # Store the run result
-                if run_result and run_result.get("triangulated_result"):
-                    run_results.append({
-                        "run_number": run_num,
-                        "triangulated_result": run_result["triangulated_result"],
-                        "triangulated_table": run_result.get("triangulated_table", []),
-                        "agent_results": get_agent_results(run_result) if run_result else {}
-                    })
-                    logger.info(f"Completed meta-ensemble run {run_num}/3 successfully")
-                else:
-                    logger.warning(f"Meta-ensemble run {run_num}/3 failed or had no results")
-                    run_results.append({
-                        "run_number": run_num,
-                        "triangulated_result": "Run failed",
-                        "triangulated_table": [],
-                        "agent_results": {}
-                    })
+                run_results.append(self._collect_run_result(run_num, run_result))
                 
                 # Update and yield run completion
                 state["progress_percentage"] = 5 + run_num * 30
@@ -198,30 +179,43 @@ class MetaEnsembleWorkflow:
                 logger.info("Error state yielding interrupted by generator close")
                 return
     
-    def _prepare_run_state(self, original_state: SpecExtractionState) -> SpecExtractionState:
+    def _run_config(self, config: Dict[str, Any], run_num: int) -> Dict[str, Any]:
+        """Build the config for one run with its own checkpoint thread id"""
+        # Copied rather than mutated so concurrent runs never share a thread id
+        base = config or {}
+        return {**base, "configurable": {**base.get("configurable", {}), "thread_id": f"meta_run_{run_num}"}}
+    
+    def _collect_run_result(self, run_num: int, run_result: SpecExtractionState) -> Dict[str, Any]:
+        """Summarize a finished run for the final ensemble"""
+        if run_succeeded(run_result):
+            logger.info(f"Completed meta-ensemble run {run_num}/3 successfully")
+            return {
+                "run_number": run_num,
+                "triangulated_result": run_result["triangulated_result"],
+                "triangulated_table": run_result.get("triangulated_table", []),
+                "agent_results": get_agent_results(run_result)
+            }
+        
+        logger.warning(f"Meta-ensemble run {run_num}/3 failed or had no results")
+        return {
+            "run_number": run_num,
+            "triangulated_result": "Run failed",
+            "triangulated_table": [],
+            "agent_results": {}
+        }
+    
+    def _prepare_run_state(self, original_state: SpecExtractionState, run_num: int) -> SpecExtractionState:
         """Prepare a fresh state for a new run (reset agent results but keep files and product)"""
         # Create a deep copy to avoid modifying original
         run_state = copy.deepcopy(original_state)
         
-        # Reset all agent statuses and results
-        run_state["search_keywords_status"] = "idle" if "search_keywords" in original_state["uploaded_files"] else "not_uploaded"
-        run_state["whatsapp_specs_status"] = "idle" if "whatsapp_specs" in original_state["uploaded_files"] else "not_uploaded"
-        run_state["pns_calls_status"] = "idle" if "pns_calls" in original_state["uploaded_files"] else "not_uploaded"
-        run_state["rejection_comments_status"] = "idle" if "rejection_comments" in original_state["uploaded_files"] else "not_uploaded"
-        run_state["lms_chats_status"] = "idle" if "lms_chats" in original_state["uploaded_files"] else "not_uploaded"
-        
-        # Reset results and errors
-        run_state["search_keywords_result"] = {}
-        run_state["whatsapp_specs_result"] = {}
-        run_state["pns_calls_result"] = {}
-        run_state["rejection_comments_result"] = {}
-        run_state["lms_chats_result"] = {}
+        # Reset all agent statuses, results and errors
+        run_state["statuses"] = initial_statuses(original_state["uploaded_files"])
+        run_state["results"] = {source: {} for source in SOURCE_NAMES}
+        run_state["errors"] = {source: "" for source in SOURCE_NAMES}
         
-        run_state["search_keywords_error"] = ""
-        run_state["whatsapp_specs_error"] = ""
-        run_state["pns_calls_error"] = ""
-        run_state["rejection_comments_error"] = ""
-        run_state["lms_chats_error"] = ""
+        # Tag the run so its logs and batch requests are attributed to it
+        run_state["current_run"] = run_num
         
         # Reset triangulation results
         run_state["triangulated_result"] = ""
@@ -232,7 +226,7 @@ class MetaEnsembleWorkflow:
         run_state["progress_percentage"] = 0
         
         # Keep only essential logs
-        run_state["logs"] = [f"Initialized run for product: {original_state['product_name']}"]
+        run_state["logs"] = [f"Initialized run {run_num} for product: {original_state['product_name']}"]
         
         return run_state
 
@@ -302,9 +296,9 @@ class SpecExtractionWorkflow:
         
         # Count completed and failed agents
         completed_count = sum(1 for source in uploaded_sources 
-                            if agents_status.get(source) == "completed")
+                            if agents_status.get(source) == STATUS_COMPLETED)
         failed_count = sum(1 for source in uploaded_sources 
-                         if agents_status.get(source) == "failed")
+                         if agents_status.get(source) == STATUS_FAILED)
         total_count = len(uploaded_sources)
         
         # Update progress
@@ -1,9 +1,91 @@
 import streamlit as st
 import pandas as pd
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import io
+import csv
+import zipfile
 import base64
-from ..utils.state import SOURCE_NAMES, DATASET_TYPE_MAPPING, get_agents_status, get_agent_results
+import logging
+import importlib.util
+from ..utils.state import (
+    SOURCE_NAMES, DATASET_TYPE_MAPPING, STATUS_PROCESSING, STATUS_COMPLETED, STATUS_FAILED,
+    get_agents_status, get_agent_results
+)
+
+try:
+    import xlsxwriter
+except ImportError:  # Optional - Excel exports fall back to openpyxl's write-only mode
+    xlsxwriter = None
+
+logger = logging.getLogger(__name__)
+
+# Without xlsxwriter, openpyxl writes the exports; checked once per process at import
+if xlsxwriter is None and importlib.util.find_spec("lxml") is None:
+    logger.warning("xlsxwriter and lxml are not installed - Excel exports will be slow")
+
+# Header with blue background, followed by the dashboard title
+HEADER_HTML = """
+<div style="background-color: #4A90E2; padding: 1rem; border-radius: 10px; margin-bottom: 2rem;">
+    <h1 style="color: white; margin: 0; font-size: 1.8rem;">
+        📊 DataFlow Analytics
+    </h1>
+    <p style="color: white; margin: 0; opacity: 0.9; font-size: 0.9rem;">
+        IndiaMart Intelligent Spec Platform
+    </p>
+</div>
+<div style="background-color: #f8f9fa; padding: 1.5rem; border-radius: 10px; border-left: 4px solid #4A90E2; margin-bottom: 2rem;">
+    <h2 style="color: #2c3e50; margin: 0; font-size: 1.5rem;">
+        🔍 Buyer Spec Extractor Dashboard
+    </h2>
+    <p style="color: #7f8c8d; margin: 0.5rem 0 0 0; font-size: 0.9rem;">
+        Extract and triangulate buyer specifications from multiple datasources
+    </p>
+</div>
+"""
+
+# Upload area styling, emitted once per page run rather than once per upload card
+UPLOAD_AREA_CSS = """
+<style>
+div[data-testid="stVerticalBlock"] > div[data-testid="stContainer"] {
+    border: 2px dashed #cbd5e0;
+    border-radius: 12px;
+    padding: 1.5rem;
+    background: linear-gradient(135deg, #f8fafc 0%, #edf2f7 100%);
+    margin-bottom: 1rem;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    min-height: 180px;
+}
+
+.uploaded-container {
+    border: 2px solid #48bb78 !important;
+    background: linear-gradient(135deg, #f0fff4 0%, #e6fffa 100%) !important;
+}
+</style>
+"""
+
+def get_uploaded_content(source_key: str) -> Optional[str]:
+    """Get the decoded contents of an uploaded source, or None if it is not uploaded
+    
+    Files are kept as raw bytes and only decoded here, when a workflow needs the text.
+    """
+    file_data = st.session_state.get(f"uploaded_{source_key}")
+    if not file_data:
+        return None
+    return file_data["content"].decode(file_data["encoding"])
+
+def get_uploaded_files() -> Dict[str, str]:
+    """Get the decoded contents of every uploaded source"""
+    uploaded_files = {}
+    for source_key in st.session_state.get("_uploaded_index", set()):
+        content = get_uploaded_content(source_key)
+        if content is not None:
+            uploaded_files[source_key] = content
+    return uploaded_files
+
+def remove_uploaded_file(source_key: str):
+    """Forget an uploaded source and release its contents"""
+    st.session_state.pop(f"uploaded_{source_key}", None)
+    st.session_state.get("_uploaded_index", set()).discard(source_key)
 
 def render_header():
     """Render the application header"""
@@ -13,29 +95,8 @@ def render_header():
         layout="wide"
     )
     
-    # Header with blue background
-    st.markdown("""
-        <div style="background-color: #4A90E2; padding: 1rem; border-radius: 10px; margin-bottom: 2rem;">
-            <h1 style="color: white; margin: 0; font-size: 1.8rem;">
-                📊 DataFlow Analytics
-            </h1>
-            <p style="color: white; margin: 0; opacity: 0.9; font-size: 0.9rem;">
-                IndiaMart Intelligent Spec Platform
-            </p>
-        </div>
-    """, unsafe_allow_html=True)
-    
-    # Dashboard title
-    st.markdown("""
-        <div style="background-color: #f8f9fa; padding: 1.5rem; border-radius: 10px; border-left: 4px solid #4A90E2; margin-bottom: 2rem;">
-            <h2 style="color: #2c3e50; margin: 0; font-size: 1.5rem;">
-                🔍 Buyer Spec Extractor Dashboard
-            </h2>
-            <p style="color: #7f8c8d; margin: 0.5rem 0 0 0; font-size: 0.9rem;">
-                Extract and triangulate buyer specifications from multiple datasources
-            </p>
-        </div>
-    """, unsafe_allow_html=True)
+    # Header and dashboard title in a single element
+    st.markdown(HEADER_HTML, unsafe_allow_html=True)
 
 def render_product_input() -> str:
     """Render product name input section"""
@@ -60,12 +121,16 @@ def render_product_input() -> str:
     
     return product_name
 
-def render_upload_section() -> Dict[str, str]:
-    """Render the file upload section with professional layout"""
+def render_upload_section() -> List[str]:
+    """Render the file upload section with professional layout
+    
+    Returns the keys of the uploaded sources; get_uploaded_files decodes their contents.
+    """
     st.markdown("### 📂 Dataset Upload & Analysis")
     st.markdown("*Upload your CSV datasets to extract and analyze buyer specifications*")
     
-    uploaded_files = {}
+    # Shared styling for all upload areas
+    st.markdown(UPLOAD_AREA_CSS, unsafe_allow_html=True)
     
     # Create professional grid layout
     row1_col1, row1_col2 = st.columns(2, gap="large")
@@ -111,59 +176,44 @@ def render_upload_section() -> Dict[str, str]:
         }
     ]
     
-    # Render each upload area
+    # Render each upload area; each is a fragment, so uploads are read back from the
+    # upload index rather than from return values
     for config in upload_configs:
         with config["container"]:
-            uploaded_file = render_single_upload_area(
+            render_single_upload_area(
                 config["key"],
                 config["title"], 
                 config["desc"],
                 config["metric"]
             )
-            
-            if uploaded_file:
-                uploaded_files[config["key"]] = uploaded_file
     
     # Add spacing
     st.markdown("<br>", unsafe_allow_html=True)
     
-    return uploaded_files
+    uploaded_index = st.session_state.get("_uploaded_index", set())
+    return [config["key"] for config in upload_configs if config["key"] in uploaded_index]
 
-def render_single_upload_area(source_key: str, title: str, description: str, metric_type: str) -> Optional[str]:
-    """Render a single upload area with proper container styling"""
-    
-    # Add container-specific CSS
-    container_id = f"upload-{source_key}"
-    
-    st.markdown(
-        f"""
-        <style>
-        div[data-testid="stVerticalBlock"] > div[data-testid="stContainer"] {{
-            border: 2px dashed #cbd5e0;
-            border-radius: 12px;
-            padding: 1.5rem;
-            background: linear-gradient(135deg, #f8fafc 0%, #edf2f7 100%);
-            margin-bottom: 1rem;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            min-height: 180px;
-        }}
-        
-        .uploaded-container {{
-            border: 2px solid #48bb78 !important;
-            background: linear-gradient(135deg, #f0fff4 0%, #e6fffa 100%) !important;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
+@st.fragment
+def render_single_upload_area(source_key: str, title: str, description: str, metric_type: str):
+    """Render a single upload area with proper container styling
+    
+    As a fragment, interacting with one area's uploader or remove button reruns only that
+    area; the whole app reruns when the number of uploads changes, since the triangulation
+    section shows that count and enables its start button from it.
+    """
     
     # Check if file is already uploaded
     if f"uploaded_{source_key}" in st.session_state:
-        return render_uploaded_file_card_clean(source_key, title, description, metric_type)
+        render_uploaded_file_card_clean(source_key, title, description, metric_type)
     else:
-        return render_upload_card_clean(source_key, title, description, metric_type)
+        render_upload_card_clean(source_key, title, description, metric_type)
 
-def render_upload_card_clean(source_key: str, title: str, description: str, metric_type: str) -> Optional[str]:
+def _rerun_after_upload_change(count_before: int):
+    """Rerun just the upload card, or the whole app if the upload count changed"""
+    count_after = len(st.session_state.get("_uploaded_index", ()))
+    st.rerun(scope="app" if count_after != count_before else "fragment")
+
+def render_upload_card_clean(source_key: str, title: str, description: str, metric_type: str):
     """Render clean upload card using native Streamlit containers"""
     
     with st.container():
@@ -190,69 +240,44 @@ def render_upload_card_clean(source_key: str, title: str, description: str, metr
             # Validate and store file with robust encoding handling
             raw_content = uploaded_file.read()
             
-            # Try multiple encodings to handle different file formats
-            encodings_to_try = ['utf-8', 'utf-8-sig', 'latin1', 'cp1252', 'iso-8859-1']
-            file_content = None
-            
-            for encoding in encodings_to_try:
-                try:
-                    file_content = raw_content.decode(encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            # If all encodings fail, use error handling
-            if file_content is None:
-                try:
-                    file_content = raw_content.decode('utf-8', errors='replace')
-                    st.warning(f"⚠️ File encoding detected as non-UTF-8. Some characters may be replaced.")
-                except Exception as e:
-                    st.error(f"❌ Failed to read file: {str(e)}")
-                    return None
-            
             # Validate file is not empty
-            if not file_content.strip():
+            if not raw_content.strip():
                 st.error(f"❌ Uploaded file appears to be empty")
-                return None
+                return
                 
-            # Basic CSV validation
-            if not any(delimiter in file_content[:1000] for delimiter in [',', ';', '\t']):
+            # Basic CSV validation on the raw bytes, before any decoding
+            head = raw_content[:1024]
+            if not (b',' in head or b';' in head or b'\t' in head):
                 st.warning(f"⚠️ File doesn't appear to be a valid CSV format")
             
-            # Store in session state
+            # Only the encoding is decided here; the bytes are stored and decoded when a workflow
+            # starts. utf-8-sig reads plain UTF-8 and drops a BOM if present; a failing UTF-8 check
+            # stops at the first invalid byte, and latin1 then maps every byte.
+            try:
+                raw_content.decode('utf-8-sig')
+                encoding = 'utf-8-sig'
+            except UnicodeDecodeError:
+                encoding = 'latin1'
+                st.warning("⚠️ File encoding detected as non-UTF-8. Some characters may not display correctly.")
+            
+            # Raw bytes stay in session state so they are freed with the session
+            count_before = len(st.session_state.get("_uploaded_index", ()))
             st.session_state[f"uploaded_{source_key}"] = {
-                "content": file_content,
+                "content": raw_content,
                 "name": uploaded_file.name,
-                "size": len(file_content),
+                "size": len(raw_content),
+                "encoding": encoding,
                 "metric_type": metric_type
             }
+            st.session_state.setdefault("_uploaded_index", set()).add(source_key)
             
-            st.rerun()
-    
-    return None
+            _rerun_after_upload_change(count_before)
 
-def render_uploaded_file_card_clean(source_key: str, title: str, description: str, metric_type: str) -> str:
+def render_uploaded_file_card_clean(source_key: str, title: str, description: str, metric_type: str):
     """Render clean uploaded file card"""
     
     file_data = st.session_state[f"uploaded_{source_key}"]
     
-    # Add success styling to container
-    st.markdown(
-        f"""
-        <style>
-        .success-container-{source_key} {{
-            border: 2px solid #48bb78 !important;
-            border-radius: 12px !important;
-            background: linear-gradient(135deg, #f0fff4 0%, #e6fffa 100%) !important;
-            padding: 1.5rem !important;
-            margin-bottom: 1rem !important;
-            box-shadow: 0 2px 8px rgba(72, 187, 120, 0.15) !important;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
-    
     with st.container():
         # Success indicator
         st.markdown(f"**✅ {title}**")
@@ -261,10 +286,25 @@ def render_uploaded_file_card_clean(source_key: str, title: str, description: st
         
         # Remove button
         if st.button(f"🗑️ Remove File", key=f"remove_{source_key}", type="secondary", use_container_width=True):
-            del st.session_state[f"uploaded_{source_key}"]
-            st.rerun()
-    
-    return file_data["content"]
+            count_before = len(st.session_state.get("_uploaded_index", ()))
+            remove_uploaded_file(source_key)
+            _rerun_after_upload_change(count_before)
+
+# Sidebar message per workflow step kind: (Streamlit element, message template)
+STEP_UI = {
+    "processing": (st.info, "📊 {}"),
+    "triangulation": (st.info, "🔗 Running triangulation..."),
+    "completed": (st.success, "✅ Processing complete!"),
+    "failed": (st.error, "❌ Processing failed")
+}
+
+# Sidebar line per agent status; anything else (idle, not started) shows as waiting
+AGENT_STATUS_LINES = {
+    STATUS_PROCESSING: "⏳ {}: Processing...",
+    STATUS_COMPLETED: "✅ {}: Completed",
+    STATUS_FAILED: "❌ {}: Failed"
+}
+AGENT_STATUS_WAITING = "⚪ {}: Waiting"
 
 def render_processing_status(state: Dict[str, Any]):
     """Render processing status sidebar and progress"""
@@ -277,36 +317,35 @@ def render_processing_status(state: Dict[str, Any]):
         progress = state.get("progress_percentage", 0)
         
         # Progress bar
-        st.progress(progress / 100)
-        st.markdown(f"**{progress}% Complete**")
+        st.progress(progress / 100, text=f"{progress}% Complete")
         
-        # Current activity
+        # Current activity - steps are "processing_*", "*_failed" or an exact STEP_UI key
         if current_step.startswith("processing"):
-            st.info(f"📊 {current_step}")
-        elif current_step == "triangulation":
-            st.info("🔗 Running triangulation...")
-        elif current_step == "completed":
-            st.success("✅ Processing complete!")
+            step_kind = "processing"
         elif "failed" in current_step:
-            st.error("❌ Processing failed")
+            step_kind = "failed"
+        else:
+            step_kind = current_step
+        step_ui = STEP_UI.get(step_kind)
+        if step_ui:
+            show, message = step_ui
+            show(message.format(current_step))
         
         # Individual agent status using helper function
         st.markdown("#### Agent Status")
         
         agents_status = get_agents_status(state)
+        uploaded_files = state.get("uploaded_files", {})
+        status_lines = []
         for source_key, status in agents_status.items():
             # Only show status for uploaded files
-            if source_key in state.get("uploaded_files", {}):
+            if source_key in uploaded_files:
                 source_name = SOURCE_NAMES.get(source_key, source_key)
-                
-                if status == "processing":
-                    st.markdown(f"⏳ {source_name}: Processing...")
-                elif status == "completed":
-                    st.markdown(f"✅ {source_name}: Completed")
-                elif status == "failed":
-                    st.markdown(f"❌ {source_name}: Failed")
-                else:
-                    st.markdown(f"⚪ {source_name}: Waiting")
+                status_lines.append(AGENT_STATUS_LINES.get(status, AGENT_STATUS_WAITING).format(source_name))
+        
+        # One element for all agents; blank lines keep each on its own paragraph
+        if status_lines:
+            st.markdown("\n\n".join(status_lines))
 
 def render_triangulation_section() -> tuple[bool, str]:
     """Render the triangulation section"""
@@ -317,7 +356,8 @@ def render_triangulation_section() -> tuple[bool, str]:
     
     with col1:
         # Status indicators
-        uploaded_count = len([k for k in st.session_state.keys() if k.startswith("uploaded_")])
+        # The upload index already tracks uploaded sources, so its size is the count
+        uploaded_count = len(st.session_state.get("_uploaded_index", ()))
         if uploaded_count > 0:
             st.info(f"📊 {uploaded_count} datasets uploaded • ✅ Analysis completed • Ready for triangulation")
         else:
@@ -342,10 +382,11 @@ def render_individual_results(agent_results: Dict[str, Dict[str, Any]]):
     st.markdown("## 📊 Individual Dataset Analysis")
     
     for source_key, result in agent_results.items():
-        if result.get("status") != "completed":
+        if result.get("status") != STATUS_COMPLETED:
             continue
             
         source_name = SOURCE_NAMES.get(source_key, source_key)
+        specs_text = result.get("extracted_specs", "")
         
         # Expandable card for each dataset
         with st.expander(f"📋 {source_name} Analysis", expanded=False):
@@ -357,9 +398,7 @@ def render_individual_results(agent_results: Dict[str, Dict[str, Any]]):
                 st.metric("📄 Total Rows", result.get("raw_data_count", 0))
             with col2:
                 # Count ISQs from result
-                specs = result.get("extracted_specs", "")
-                isq_count = len([line for line in specs.split('\n') if line.strip() and '|' in line]) - 1
-                st.metric("🎯 Top ISQs", max(0, isq_count))
+                st.metric("🎯 Top ISQs", _count_isqs(specs_text))
             with col3:
                 st.metric("⏱️ Processing Time", f"{result.get('processing_time', 0)}s")
             
@@ -370,10 +409,29 @@ def render_individual_results(agent_results: Dict[str, Dict[str, Any]]):
                     download_individual_result(source_key, result)
             
             # Display results table
-            specs_text = result.get("extracted_specs", "")
             if specs_text:
                 display_specs_table(specs_text)
 
+# Columns of every triangulated / meta-ensemble table row
+TRI_COLUMNS = ("Rank", "Specification", "Top Options", "Why it matters", "Impacts Pricing?")
+
+def _triangulation_df(table: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Build a DataFrame from triangulation table rows with the known column layout"""
+    df = pd.DataFrame.from_records(table, columns=list(TRI_COLUMNS))
+    # Nullable Int32 so rows without a usable Rank (error rows, restored results) show blank
+    df["Rank"] = pd.to_numeric(df["Rank"], errors="coerce").astype("Int32")
+    return df
+
+def _summarize_agents(agent_results: Dict[str, Dict[str, Any]]) -> Tuple[int, int]:
+    """Count completed agents and their total processed rows in a single pass"""
+    completed_count = 0
+    total_rows = 0
+    for result in agent_results.values():
+        if result.get("status") == STATUS_COMPLETED:
+            completed_count += 1
+            total_rows += int(result.get("raw_data_count", 0))
+    return completed_count, total_rows
+
 def render_final_results(triangulated_result: str, triangulated_table: List[Dict[str, Any]]):
     """Render final triangulated results (handles both single and meta-ensemble results)"""
     
@@ -419,7 +477,7 @@ def render_meta_ensemble_results(final_results: Dict[str, Any]):
         st.markdown("*Highest confidence specifications validated across multiple runs*")
         
         if final_ensemble_table:
-            df = pd.DataFrame(final_ensemble_table)
+            df = _triangulation_df(final_ensemble_table)
             
             # Enhanced styling for meta-ensemble results
             st.dataframe(
@@ -456,7 +514,7 @@ def render_meta_ensemble_results(final_results: Dict[str, Any]):
                     triangulated_table = run_data.get("triangulated_table", [])
                     
                     if triangulated_table:
-                        df = pd.DataFrame(triangulated_table)
+                        df = _triangulation_df(triangulated_table)
                         st.dataframe(df, use_container_width=True, hide_index=True)
                     else:
                         st.markdown(triangulated_result)
@@ -468,43 +526,43 @@ def render_meta_ensemble_results(final_results: Dict[str, Any]):
                     agent_results = run_data.get("agent_results", {})
                     
                     if agent_results:
-                        # Create tabs for each agent
-                        agent_tabs = []
-                        agent_data = []
-                        
-                        for source_key, result in agent_results.items():
-                            if result.get("status") == "completed":
-                                source_name = SOURCE_NAMES.get(source_key, source_key)
-                                agent_tabs.append(f"📊 {source_name}")
-                                agent_data.append((source_key, result))
+                        # One selectable agent per run - st.tabs would run every tab's body on each rerun
+                        agent_options = _agent_tab_labels(agent_results)
                         
-                        if agent_tabs:
-                            tabs = st.tabs(agent_tabs)
+                        if agent_options:
+                            agent_tabs = [label for _, label in agent_options]
+                            selected = st.selectbox("Agent", agent_tabs, key=f"agent_sel_{run_num}")
+                            source_key = agent_options[agent_tabs.index(selected)][0]
+                            result = agent_results[source_key]
+                            specs_text = result.get("extracted_specs", "")
                             
-                            for tab, (source_key, result) in zip(tabs, agent_data):
-                                with tab:
-                                    # Agent summary stats
-                                    col1, col2, col3 = st.columns(3)
-                                    
-                                    with col1:
-                                        st.metric("📄 Total Rows", result.get("raw_data_count", 0))
-                                    with col2:
-                                        # Count specifications from result
-                                        specs = result.get("extracted_specs", "")
-                                        spec_count = len([line for line in specs.split('\n') if line.strip() and '|' in line and 'Rank' not in line]) if specs else 0
-                                        st.metric("🎯 Specifications", max(0, spec_count))
-                                    with col3:
-                                        st.metric("⏱️ Processing Time", f"{result.get('processing_time', 0):.1f}s")
-                                    
-                                    # Display agent's extracted specifications
-                                    specs_text = result.get("extracted_specs", "")
-                                    if specs_text:
-                                        display_specs_table(specs_text)
-                                    else:
-                                        st.info("No specifications extracted for this agent in this run")
+                            # Agent summary stats
+                            col1, col2, col3 = st.columns(3)
+                            
+                            with col1:
+                                st.metric("📄 Total Rows", result.get("raw_data_count", 0))
+                            with col2:
+                                # Count specifications from result
+                                st.metric("🎯 Specifications", _count_isqs(specs_text))
+                            with col3:
+                                st.metric("⏱️ Processing Time", f"{result.get('processing_time', 0):.1f}s")
+                            
+                            # Display agent's extracted specifications
+                            if specs_text:
+                                display_specs_table(specs_text)
+                            else:
+                                st.info("No specifications extracted for this agent in this run")
                     else:
                         st.info("No individual agent results available for this run")
 
+def _agent_tab_labels(agent_results: Dict[str, Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """(source key, label) for each completed agent of a run"""
+    return [
+        (source_key, f"📊 {SOURCE_NAMES.get(source_key, source_key)}")
+        for source_key, result in agent_results.items()
+        if result.get("status") == STATUS_COMPLETED
+    ]
+
 def render_single_triangulation_results(triangulated_result: str, triangulated_table: List[Dict[str, Any]]):
     """Render single triangulation results (fallback for non-meta-ensemble)"""
     
@@ -520,9 +578,7 @@ def render_single_triangulation_results(triangulated_result: str, triangulated_t
         agent_results = get_agent_results(final_results)
         
         # Calculate totals from completed agents
-        completed_results = {k: v for k, v in agent_results.items() if v.get("status") == "completed"}
-        total_rows = sum([int(result.get("raw_data_count", 0)) for result in completed_results.values()])
-        datasets_count = len(completed_results)
+        datasets_count, total_rows = _summarize_agents(agent_results)
         
         st.info(f"✅ Analysis completed • {total_rows:,} total rows from {datasets_count} datasets")
     
@@ -539,7 +595,7 @@ def render_single_triangulation_results(triangulated_result: str, triangulated_t
     
     # Display final results table
     if triangulated_table:
-        df = pd.DataFrame(triangulated_table)
+        df = _triangulation_df(triangulated_table)
         
         # Custom styling for the table to match competitor format
         st.dataframe(
@@ -558,29 +614,46 @@ def render_single_triangulation_results(triangulated_result: str, triangulated_t
         # Fallback: display raw text
         st.markdown(triangulated_result)
 
+@st.cache_data(max_entries=256, show_spinner=False)
+def _parse_specs_to_df(specs_text: str) -> Optional[pd.DataFrame]:
+    """Parse an agent's pipe-delimited specs table into a DataFrame, or None if it has no table rows"""
+    # Keep only table lines so surrounding prose doesn't reach the parser; the first is the header
+    table_text = "\n".join(line for line in specs_text.split('\n') if '|' in line)
+    if not table_text:
+        return None
+    
+    try:
+        df = pd.read_csv(io.StringIO(table_text), sep='|', engine='c', dtype=str,
+                         skipinitialspace=True, quoting=csv.QUOTE_NONE, on_bad_lines='skip')
+    except (pd.errors.ParserError, pd.errors.EmptyDataError):
+        return None
+    
+    # Leading/trailing pipes produce empty edge columns; drop them, then the markdown separator row
+    df = df.dropna(axis=1, how='all')
+    if df.empty or df.columns.empty:
+        return None
+    df.columns = df.columns.str.strip()
+    df = df[~df.iloc[:, 0].fillna('').str.startswith('---')].dropna(how='all')
+    df = df.apply(lambda column: column.str.strip())
+    
+    return df.reset_index(drop=True) if not df.empty else None
+
+def _count_isqs(specs_text: str) -> int:
+    """Count the ISQ rows in an agent's specs table, reusing the cached parse"""
+    if not specs_text:
+        return 0
+    df = _parse_specs_to_df(specs_text)
+    return 0 if df is None else len(df)
+
 def display_specs_table(specs_text: str):
     """Display specifications in a nice table format"""
     try:
-        lines = specs_text.strip().split('\n')
-        if len(lines) < 2:
+        if len(specs_text.strip().split('\n')) < 2:
             st.text(specs_text)
             return
         
-        # Parse table data
-        data = []
-        headers = []
-        
-        for i, line in enumerate(lines):
-            if '|' in line:
-                parts = [part.strip() for part in line.split('|')]
-                if i == 0 or 'Rank' in line:  # Header row
-                    headers = parts
-                else:
-                    if len(parts) >= len(headers):
-                        data.append(parts[:len(headers)])
-        
-        if data and headers:
-            df = pd.DataFrame(data, columns=headers)
+        df = _parse_specs_to_df(specs_text)
+        if df is not None:
             st.dataframe(df, use_container_width=True, hide_index=True)
         else:
             st.text(specs_text)
@@ -588,123 +661,184 @@ def display_specs_table(specs_text: str):
     except Exception:
         st.text(specs_text)
 
-def download_meta_ensemble_results(final_results: Dict[str, Any]):
-    """Generate download for meta-ensemble results with all runs and individual agent outputs"""
-    try:
-        # Create Excel file with multiple sheets
-        output = io.BytesIO()
+def _records_sheet(sheet_name: str, records: List[Dict[str, Any]]) -> Tuple[str, List[str], List[list]]:
+    """Lay out a list of row dicts as a sheet, with columns taken from the first row"""
+    first_keys = records[0].keys()
+    columns = list(first_keys)
+    # Agent tables are homogeneous; any other shape falls back to the union of keys in first-seen order
+    if any(record.keys() != first_keys for record in records):
+        columns = list(dict.fromkeys(key for record in records for key in record))
+    return sheet_name, columns, [[record.get(c) for c in columns] for record in records]
+
+def _meta_ensemble_sheets(final_results: Dict[str, Any]) -> List[Tuple[str, List[str], List[list]]]:
+    """Lay out the meta-ensemble export as (sheet name, columns, rows), shared by every export format"""
+    sheets = []
+    meta_rows = []  # One metadata row per agent per run, written together to All_Metadata
+    
+    # Sheet 1: Final Consensus Results
+    final_ensemble_table = final_results.get("final_ensemble_table", [])
+    if final_ensemble_table:
+        sheets.append(_records_sheet('Final_Consensus', final_ensemble_table))
+    
+    # Sheets for Individual Run Results and Agent Outputs
+    run_results = final_results.get("run_results", [])
+    for run_data in run_results:
+        run_num = run_data.get("run_number", 0)
         
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            
-            # Sheet 1: Final Consensus Results
-            final_ensemble_table = final_results.get("final_ensemble_table", [])
-            if final_ensemble_table:
-                df_final = pd.DataFrame(final_ensemble_table)
-                df_final.to_excel(writer, sheet_name='Final_Consensus', index=False)
-            
-            # Sheets for Individual Run Results and Agent Outputs
-            run_results = final_results.get("run_results", [])
-            for run_data in run_results:
-                run_num = run_data.get("run_number", 0)
-                
-                # Sheet: Run triangulated results
-                triangulated_table = run_data.get("triangulated_table", [])
-                if triangulated_table:
-                    df_run = pd.DataFrame(triangulated_table)
-                    df_run.to_excel(writer, sheet_name=f'Run_{run_num}_Triangulated', index=False)
-                else:
-                    # Create a simple sheet with the text result
-                    df_text = pd.DataFrame([{"Result": run_data.get("triangulated_result", "No data")}])
-                    df_text.to_excel(writer, sheet_name=f'Run_{run_num}_Triangulated', index=False)
+        # Sheet: Run triangulated results
+        triangulated_table = run_data.get("triangulated_table", [])
+        if triangulated_table:
+            sheets.append(_records_sheet(f'Run_{run_num}_Triangulated', triangulated_table))
+        else:
+            # Create a simple sheet with the text result
+            sheets.append((f'Run_{run_num}_Triangulated', ["Result"],
+                           [[run_data.get("triangulated_result", "No data")]]))
+        
+        # Sheets: Individual agent results for this run
+        agent_results = run_data.get("agent_results", {})
+        for source_key, result in agent_results.items():
+            if result.get("status") == STATUS_COMPLETED:
+                specs_text = result.get("extracted_specs", "")
+                sheet_name = f'R{run_num}_{source_key[:10]}'  # Truncate for Excel limits
                 
-                # Sheets: Individual agent results for this run
-                agent_results = run_data.get("agent_results", {})
-                for source_key, result in agent_results.items():
-                    if result.get("status") == "completed":
-                        source_name = SOURCE_NAMES.get(source_key, source_key)
-                        specs_text = result.get("extracted_specs", "")
-                        
-                        if specs_text:
-                            # Parse the specs table into DataFrame
-                            try:
-                                lines = specs_text.strip().split('\n')
-                                data = []
-                                headers = []
-                                
-                                for i, line in enumerate(lines):
-                                    if '|' in line:
-                                        parts = [part.strip() for part in line.split('|')]
-                                        if i == 0 or 'Rank' in line:  # Header row
-                                            headers = [h for h in parts if h]  # Remove empty parts
-                                        else:
-                                            if len(parts) >= len(headers) and any(parts):
-                                                clean_parts = [p for p in parts if p][:len(headers)]
-                                                if len(clean_parts) == len(headers):
-                                                    data.append(clean_parts)
-                                
-                                if data and headers:
-                                    df_agent = pd.DataFrame(data, columns=headers)
-                                    # Add metadata
-                                    metadata = pd.DataFrame([
-                                        ["Total Rows", result.get("raw_data_count", 0)],
-                                        ["Processing Time (s)", result.get("processing_time", 0)],
-                                        ["Status", result.get("status", "unknown")]
-                                    ], columns=["Metric", "Value"])
-                                    
-                                    # Write to separate sheets
-                                    sheet_name = f'R{run_num}_{source_key[:10]}'  # Truncate for Excel limits
-                                    df_agent.to_excel(writer, sheet_name=f'{sheet_name}_Data', index=False)
-                                    metadata.to_excel(writer, sheet_name=f'{sheet_name}_Meta', index=False)
-                                else:
-                                    # Fallback: raw text
-                                    df_raw = pd.DataFrame([{"Raw_Output": specs_text}])
-                                    sheet_name = f'R{run_num}_{source_key[:10]}'
-                                    df_raw.to_excel(writer, sheet_name=f'{sheet_name}_Raw', index=False)
-                                    
-                            except Exception:
-                                # Fallback: raw text
-                                df_raw = pd.DataFrame([{"Raw_Output": specs_text}])
-                                sheet_name = f'R{run_num}_{source_key[:10]}'
-                                df_raw.to_excel(writer, sheet_name=f'{sheet_name}_Raw', index=False)
-            
-            # Final Sheet: Meta-Ensemble Summary
-            summary_data = {
-                "Metric": ["Total Runs", "Successful Runs", "Final Consensus Specs", "Total Datasets Processed"],
-                "Value": [
-                    len(run_results),
-                    len([r for r in run_results if r.get("triangulated_result") != "Run failed"]),
-                    len(final_ensemble_table),
-                    len([k for k in ["search_keywords", "whatsapp_specs", "pns_calls", "rejection_comments", "lms_chats"] 
-                         if final_results.get("uploaded_files", {}).get(k)])
-                ]
-            }
-            df_summary = pd.DataFrame(summary_data)
-            df_summary.to_excel(writer, sheet_name='Meta_Summary', index=False)
+                if specs_text:
+                    # Parse the specs table into DataFrame
+                    df_agent = _parse_specs_to_df(specs_text)
+                    
+                    if df_agent is not None:
+                        sheets.append((f'{sheet_name}_Data', list(df_agent.columns),
+                                       df_agent.fillna('').values.tolist()))
+                        meta_rows.append([
+                            run_num,
+                            source_key,
+                            result.get("raw_data_count", 0),
+                            result.get("processing_time", 0),
+                            result.get("status", "unknown")
+                        ])
+                    else:
+                        # Fallback: raw text
+                        sheets.append((f'{sheet_name}_Raw', ["Raw_Output"], [[specs_text]]))
+    
+    # Agent metadata for every run in a single sheet
+    if meta_rows:
+        sheets.append(('All_Metadata', ["Run", "Agent", "Total Rows", "Processing Time (s)", "Status"], meta_rows))
+    
+    # Final Sheet: Meta-Ensemble Summary
+    sheets.append(('Meta_Summary', ["Metric", "Value"], [
+        ["Total Runs", len(run_results)],
+        ["Successful Runs", len([r for r in run_results if r.get("triangulated_result") != "Run failed"])],
+        ["Final Consensus Specs", len(final_ensemble_table)],
+        ["Total Datasets Processed",
+         len([k for k in ["search_keywords", "whatsapp_specs", "pns_calls", "rejection_comments", "lms_chats"]
+              if final_results.get("uploaded_files", {}).get(k)])]
+    ]))
+    
+    return sheets
+
+def _sheets_to_xlsx_openpyxl(sheets, output: io.BytesIO):
+    """Write sheets with openpyxl in write-only mode, which streams rows instead of keeping cell objects"""
+    # Only needed when xlsxwriter is missing, so cold starts don't pay for the import
+    import openpyxl
+    
+    workbook = openpyxl.Workbook(write_only=True)
+    for sheet_name, columns, rows in sheets:
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append(list(columns))
+        for row in rows:
+            worksheet.append(row)
+    workbook.save(output)
+
+def _sheets_to_xlsx(sheets: List[Tuple[str, List[str], List[list]]]) -> bytes:
+    """Write sheets to an Excel workbook"""
+    output = io.BytesIO()
+    
+    if xlsxwriter is None:
+        _sheets_to_xlsx_openpyxl(sheets, output)
+        return output.getvalue()
+    
+    # constant_memory flushes each row as it is written instead of keeping every sheet's cells
+    # in memory until the workbook closes; it requires rows to be written strictly in order
+    with xlsxwriter.Workbook(output, {'constant_memory': True, 'strings_to_urls': False}) as workbook:
+        for sheet_name, columns, rows in sheets:
+            worksheet = workbook.add_worksheet(sheet_name)
+            worksheet.write_row(0, 0, columns)
+            for row_idx, row in enumerate(rows, 1):
+                worksheet.write_row(row_idx, 0, row)
+    
+    return output.getvalue()
+
+def _sheets_to_parquet_zip(sheets: List[Tuple[str, List[str], List[list]]]) -> bytes:
+    """Write each sheet as a zstd-compressed Parquet file inside a zip bundle"""
+    output = io.BytesIO()
+    
+    # The Parquet files are already compressed, so the zip only stores them
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as bundle:
+        for sheet_name, columns, rows in sheets:
+            df = pd.DataFrame(rows, columns=columns)
+            # Metric/Value style columns mix numbers and text, which Parquet can't store in one column
+            text_columns = df.select_dtypes('object').columns
+            df[text_columns] = df[text_columns].fillna('').astype(str)
+            bundle.writestr(f'{sheet_name}.parquet', df.to_parquet(engine='pyarrow', compression='zstd', index=False))
+    
+    return output.getvalue()
+
+def _sheets_to_csv_zip(sheets: List[Tuple[str, List[str], List[list]]]) -> bytes:
+    """Write each sheet as a CSV file inside a deflated zip bundle"""
+    output = io.BytesIO()
+    
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as bundle:
+        for sheet_name, columns, rows in sheets:
+            # Rows are encoded straight into the zip entry; the BOM lets Excel detect UTF-8
+            with bundle.open(f'{sheet_name}.csv', 'w') as entry, \
+                    io.TextIOWrapper(entry, encoding='utf-8-sig', newline='') as text:
+                writer = csv.writer(text)
+                writer.writerow(columns)
+                writer.writerows(rows)
+    
+    return output.getvalue()
+
+def download_meta_ensemble_results(final_results: Dict[str, Any]):
+    """Generate downloads for meta-ensemble results with all runs and individual agent outputs"""
+    if not (final_results.get("final_ensemble_table") or final_results.get("run_results")):
+        st.warning("No results to export")
+        return
+    
+    try:
+        sheets = _meta_ensemble_sheets(final_results)
         
-        st.download_button(
-            label="📥 Download Complete Meta-Ensemble Results (Excel)",
-            data=output.getvalue(),
-            file_name="complete_meta_ensemble_results.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="📥 Download Complete Meta-Ensemble Results (Excel)",
+                data=_sheets_to_xlsx(sheets),
+                file_name="complete_meta_ensemble_results.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                key="download_btn_meta_xlsx"
+            )
+        with col2:
+            st.download_button(
+                label="📦 Download as Parquet Bundle",
+                data=_sheets_to_parquet_zip(sheets),
+                file_name="complete_meta_ensemble_results_parquet.zip",
+                mime="application/zip",
+                key="download_btn_meta_parquet"
+            )
         
     except Exception as e:
         st.error(f"Error preparing meta-ensemble download: {str(e)}")
 
+# Download button label per source, formatted once at import
+_DOWNLOAD_LABELS = {key: f"Download {name} Results" for key, name in SOURCE_NAMES.items()}
+
 def download_individual_result(source_key: str, result: Dict[str, Any]):
     """Generate download for individual result"""
     try:
         specs_text = result.get("extracted_specs", "")
         
-        # Convert to CSV format
-        output = io.StringIO()
-        output.write(specs_text)
-        csv_data = output.getvalue()
-        
-        # Create download
+        # Create download - the specs text is offered as-is
         st.download_button(
-            label=f"Download {SOURCE_NAMES.get(source_key, source_key)} Results",
-            data=csv_data,
+            label=_DOWNLOAD_LABELS.get(source_key) or f"Download {source_key} Results",
+            data=specs_text,
             file_name=f"{source_key}_results.csv",
             mime="text/csv",
             key=f"download_btn_{source_key}"
@@ -713,30 +847,48 @@ def download_individual_result(source_key: str, result: Dict[str, Any]):
     except Exception as e:
         st.error(f"Error preparing download: {str(e)}")
 
+@st.cache_data(max_entries=16, show_spinner=False)
+def _build_xlsx_bytes(triangulated_table: List[Dict[str, Any]]) -> bytes:
+    """Serialize the triangulated table to xlsx, memoized on the table contents across reruns"""
+    # Rows go straight from the table dicts into the worksheet (constant_memory with
+    # xlsxwriter, write-only openpyxl otherwise) without building a DataFrame first
+    return _sheets_to_xlsx([_records_sheet('Triangulated_Results', triangulated_table)])
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _build_csv_zip_bytes(triangulated_table: List[Dict[str, Any]]) -> bytes:
+    """Serialize the triangulated table to a zipped CSV, memoized on the table contents across reruns"""
+    return _sheets_to_csv_zip([_records_sheet('triangulated_results', triangulated_table)])
+
 def download_final_results(triangulated_result: str, triangulated_table: List[Dict[str, Any]]):
     """Generate download for final results"""
     try:
         if triangulated_table:
-            df = pd.DataFrame(triangulated_table)
-            
-            # Create Excel file
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Triangulated_Results', index=False)
-            
-            st.download_button(
-                label="📥 Download Triangulated Results (Excel)",
-                data=output.getvalue(),
-                file_name="triangulated_spec_results.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    label="📥 Download Triangulated Results (Excel)",
+                    data=_build_xlsx_bytes(triangulated_table),
+                    file_name="triangulated_spec_results.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    key="download_btn_final_xlsx"
+                )
+            with col2:
+                # CSV skips the xlsx XML, so it is the quicker export for large tables
+                st.download_button(
+                    label="🗜️ Download as Zipped CSV",
+                    data=_build_csv_zip_bytes(triangulated_table),
+                    file_name="triangulated_spec_results.zip",
+                    mime="application/zip",
+                    key="download_btn_final_csv_zip"
+                )
         else:
             # Fallback: text download
             st.download_button(
                 label="📥 Download Results (Text)",
                 data=triangulated_result,
                 file_name="triangulated_results.txt", 
-                mime="text/plain"
+                mime="text/plain",
+                key="download_btn_final_text"
             )
             
     except Exception as e:
@@ -0,0 +1,85 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Uploaded CSV contents live here, content-addressed, so workflow state only carries
+# short paths instead of the full text through every checkpoint and per-run deepcopy
+UPLOAD_DIR = os.getenv("STRIVE_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "strive_uploads"))
+
+# Stored files untouched for this long are deleted; every store or reuse refreshes a file
+UPLOAD_RETENTION_SECONDS = float(os.getenv("STRIVE_UPLOAD_RETENTION_HOURS", "24")) * 3600
+PRUNE_INTERVAL_SECONDS = 3600
+
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+
+def _write_file(path: str, content: str):
+    """Write content to path atomically"""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    # Written to a temp name and renamed so concurrent runs never read a partial file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+def prune_expired_uploads():
+    """Delete stored uploads older than the retention window, at most once per interval"""
+    global _last_prune
+    now = time.time()
+    with _prune_lock:
+        if now - _last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        _last_prune = now
+
+    cutoff = now - UPLOAD_RETENTION_SECONDS
+    try:
+        entries = list(os.scandir(UPLOAD_DIR))
+    except FileNotFoundError:
+        return
+
+    removed = 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError as e:
+            logger.warning(f"Could not prune upload {entry.name}: {str(e)}")
+    if removed:
+        logger.info(f"Pruned {removed} expired uploads from {UPLOAD_DIR}")
+
+def store_file_content(content: str) -> str:
+    """Write file content to the upload store and return its path"""
+    digest = hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+    path = os.path.join(UPLOAD_DIR, f"{digest}.csv")
+
+    # Identical uploads map to the same file, so an existing one is reused as-is
+    # and its mtime refreshed to keep it inside the retention window
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        _write_file(path, content)
+        logger.info(f"Stored upload {digest} ({len(content)} chars)")
+
+    prune_expired_uploads()
+    return path
+
+def ensure_file_content(path: str, content: str) -> str:
+    """Return a usable path for content, re-storing it if path was cleaned up or moved"""
+    if os.path.dirname(path) == UPLOAD_DIR:
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+    return store_file_content(content)
+
+def load_file_content(path: str) -> str:
+    """Read file content back from the upload store"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return f.read()
@@ -1,36 +1,52 @@
-from typing import Dict, List, Any, Optional
-from typing_extensions import TypedDict, Annotated
-import json
-import operator
+import sys
+from typing import Dict, List, Any
+from types import MappingProxyType
+from .file_store import store_file_content
+
+# Stdlib TypedDict on 3.11+, the typing_extensions backport on older interpreters
+if sys.version_info >= (3, 11):
+    from typing import TypedDict, Annotated
+else:
+    from typing_extensions import TypedDict, Annotated
+
+# Agent status values; compared against these constants rather than ad-hoc literals
+STATUS_IDLE = "idle"
+STATUS_NOT_UPLOADED = "not_uploaded"
+STATUS_PROCESSING = "processing"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+def merge_dict(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge per-agent updates so concurrent agents can each write their own key"""
+    return {**left, **right}
+
+def extend_logs(left: List[str], right: List[str]) -> List[str]:
+    """Combine concurrent log lines into a new list, leaving both inputs untouched"""
+    # The channel can hold the caller's own input list, so it must never be mutated here
+    return [*left, *right]
 
 class SpecExtractionState(TypedDict):
     """State for the Spec Extraction LangGraph workflow"""
     
     # User inputs - these should not be updated after initialization
     product_name: str
-    uploaded_files: Dict[str, str]  # {source_name: file_content}
+    uploaded_files: Dict[str, str]  # {source_name: upload store path}, see file_store
     
     # Meta-ensemble tracking
     meta_ensemble_enabled: bool
     current_run: int  # 1, 2, or 3
     total_runs: int   # Always 3 for meta-ensemble
     run_results: List[Dict[str, Any]]  # Store results from each run
+    batch_mode: bool  # Send triangulation through the OpenAI Batch API (bulk runs, not the UI)
+    response_cache: bool  # Opt-in reuse of cached final-ensemble responses for identical prompts
     
-    # Processing state - each agent updates its own unique key
-    search_keywords_status: str
-    whatsapp_specs_status: str
-    pns_calls_status: str
-    rejection_comments_status: str
-    lms_chats_status: str
+    # Processing state - keyed by source, each agent merges in its own entry
+    statuses: Annotated[Dict[str, str], merge_dict]
     
     current_step: str
     
-    # Agent outputs - each agent has its own unique key
-    search_keywords_result: Dict[str, Any]
-    whatsapp_specs_result: Dict[str, Any]
-    pns_calls_result: Dict[str, Any]
-    rejection_comments_result: Dict[str, Any]
-    lms_chats_result: Dict[str, Any]
+    # Agent outputs - keyed by source, each agent merges in its own entry
+    results: Annotated[Dict[str, Dict[str, Any]], merge_dict]
     
     # Final triangulation
     triangulated_result: str
@@ -42,14 +58,10 @@ class SpecExtractionState(TypedDict):
     
     # Progress & logging - using annotations for concurrent updates
     progress_percentage: int
-    logs: Annotated[List[str], operator.add]  # Allow concurrent log additions
+    logs: Annotated[List[str], extend_logs]  # Allow concurrent log additions
     
-    # Errors - each agent has its own unique error key
-    search_keywords_error: str
-    whatsapp_specs_error: str
-    pns_calls_error: str
-    rejection_comments_error: str
-    lms_chats_error: str
+    # Errors - keyed by source, each agent merges in its own entry
+    errors: Annotated[Dict[str, str], merge_dict]
 
 # Dataset type mapping
 DATASET_TYPE_MAPPING = {
@@ -92,65 +104,55 @@ SOURCE_NAMES = {
     "lms_chats": "LMS Chat Logs"
 }
 
-def create_initial_state(product_name: str, files: Dict[str, str]) -> SpecExtractionState:
-    """Create initial state for the workflow"""
-    return SpecExtractionState(
+# Starting status for a source, looked up by whether it was uploaded
+_STATUS_BY_UPLOADED = {True: STATUS_IDLE, False: STATUS_NOT_UPLOADED}
+
+# Immutable defaults shared by every initial state, built once at import;
+# containers are left out so each state gets its own lists and dicts
+_INITIAL_SCALARS = MappingProxyType({
+    "meta_ensemble_enabled": True,  # Always enable meta-ensemble
+    "current_run": 0,
+    "total_runs": 3,
+    "current_step": "initialization",
+    "triangulated_result": "",
+    "final_ensemble_result": "",
+    "progress_percentage": 0,
+    "response_cache": False
+})
+
+def initial_statuses(files: Dict[str, str]) -> Dict[str, str]:
+    """Starting status for every source: idle if uploaded, otherwise not_uploaded"""
+    return {source: _STATUS_BY_UPLOADED[source in files] for source in SOURCE_NAMES}
+
+def create_initial_state(product_name: str, files: Dict[str, str], batch_mode: bool = False) -> SpecExtractionState:
+    """Create initial state for the workflow
+    
+    files maps source keys to CSV content; the content goes to the upload store and
+    the state keeps only its path.
+    """
+    state = SpecExtractionState(_INITIAL_SCALARS)
+    state.update(
         product_name=product_name,
-        uploaded_files=files,
-        meta_ensemble_enabled=True,  # Always enable meta-ensemble
-        current_run=0,
-        total_runs=3,
+        uploaded_files={source: store_file_content(content) for source, content in files.items()},
         run_results=[],
-        search_keywords_status="idle" if "search_keywords" in files else "not_uploaded",
-        whatsapp_specs_status="idle" if "whatsapp_specs" in files else "not_uploaded",
-        pns_calls_status="idle" if "pns_calls" in files else "not_uploaded",
-        rejection_comments_status="idle" if "rejection_comments" in files else "not_uploaded",
-        lms_chats_status="idle" if "lms_chats" in files else "not_uploaded",
-        current_step="initialization",
-        search_keywords_result={},
-        whatsapp_specs_result={},
-        pns_calls_result={},
-        rejection_comments_result={},
-        lms_chats_result={},
-        triangulated_result="",
+        batch_mode=batch_mode,
+        statuses=initial_statuses(files),
+        results={source: {} for source in SOURCE_NAMES},
         triangulated_table=[],
-        final_ensemble_result="",
         final_ensemble_table=[],
-        progress_percentage=0,
         logs=[f"Initialized meta-ensemble workflow for product: {product_name}"],
-        search_keywords_error="",
-        whatsapp_specs_error="",
-        pns_calls_error="",
-        rejection_comments_error="",
-        lms_chats_error=""
+        errors=dict.fromkeys(SOURCE_NAMES, "")
     )
+    return state
 
 def get_agents_status(state: SpecExtractionState) -> Dict[str, str]:
-    """Get agents status from individual status fields"""
-    return {
-        "search_keywords": state["search_keywords_status"],
-        "whatsapp_specs": state["whatsapp_specs_status"],
-        "pns_calls": state["pns_calls_status"],
-        "rejection_comments": state["rejection_comments_status"],
-        "lms_chats": state["lms_chats_status"]
-    }
+    """Get agents status keyed by source"""
+    return state["statuses"]
 
 def get_agent_results(state: SpecExtractionState) -> Dict[str, Dict[str, Any]]:
-    """Get agent results from individual result fields"""
-    return {
-        "search_keywords": state["search_keywords_result"],
-        "whatsapp_specs": state["whatsapp_specs_result"],
-        "pns_calls": state["pns_calls_result"],
-        "rejection_comments": state["rejection_comments_result"],
-        "lms_chats": state["lms_chats_result"]
-    }
+    """Get agent results keyed by source"""
+    return state["results"]
 
 def get_errors(state: SpecExtractionState) -> Dict[str, str]:
-    """Get errors from individual error fields"""
-    return {
-        "search_keywords": state["search_keywords_error"],
-        "whatsapp_specs": state["whatsapp_specs_error"],
-        "pns_calls": state["pns_calls_error"],
-        "rejection_comments": state["rejection_comments_error"],
-        "lms_chats": state["lms_chats_error"]
-    } 
\ No newline at end of file
+    """Get agent errors keyed by source"""
+    return state["errors"]